@@ -1,5 +1,13 @@
+from object_pool import ObjectPool
+
+
 class Person:
+    __slots__ = ('name', 'position', 'date_of_birth')
+
     def __init__(self):
+        self.reset()
+
+    def reset(self):
         self.name = None
         self.position = None
         self.date_of_birth = None
@@ -8,17 +16,30 @@ class Person:
         return f'{self.name} born on {self.date_of_birth} works as {self.position}'
 
     @staticmethod
-    def new():
-        return PersonBuilder()
+    def new(pool=None):
+        return PersonBuilder(pool)
+
+    @staticmethod
+    def pool(max_size=1024):
+        """Пул объектов Person: объект берется строителем, а после использования возвращается через builder.release()."""
+        return ObjectPool(Person, max_size)
 
 
 class PersonBuilder:
-    def __init__(self):
-        self.person = Person()
+    # У каждого строителя свой объект: новый или взятый из пула под маркером lease этого строителя
+    def __init__(self, pool=None):
+        self.pool = pool
+        self.lease = object() if pool is not None else None
+        self.person = pool.acquire(self.lease) if pool is not None else Person()
 
     def build(self):
         return self.person
 
+    def release(self):
+        """Возвращает объект в пул. После этого ни строитель, ни построенный объект использовать нельзя."""
+        self.pool.release(self.person, self.lease)
+        self.person = None
+
 
 class PersonInfoBuilder(PersonBuilder):
     def called(self, name):
@@ -38,6 +59,14 @@ class PersonBirthDateBuilder(PersonJobBuilder):
         return self
 
 
-pb = PersonBirthDateBuilder()
-me = pb.called('Mikhail').works_as_a('Developer').born('10.09.2022').build()
-print(me)
+if __name__ == '__main__':
+    pb = PersonBirthDateBuilder()
+    me = pb.called('Mikhail').works_as_a('Developer').born('10.09.2022').build()
+    print(me)
+
+    pool = Person.pool(max_size=16)
+    for i in range(10_000):
+        builder = PersonBirthDateBuilder(pool)
+        person = builder.called(f'Person {i}').works_as_a('Developer').build()
+        builder.release()
+    print(pool.stats())
@@ -0,0 +1,46 @@
+# Замер генерации кода для широких классов (10, 10K и 100K полей):
+# склеивание через += (как было в Code.create_init_body) против сборки кусками (''.join в __str__, writelines в write_to),
+# а также генерация модуля из многих классов за один проход.
+import io
+import time
+
+import exc_code_builder
+import solution
+
+
+def concat_render(name, fields, indent_size=4):
+    # Исходный способ: строка растет через +=
+    indent = ' ' * indent_size * 2
+    result = f'class {name}:\n{" " * indent_size}def __init__(self):\n'
+    for field, value in fields:
+        result += f'{indent}self.{field} = {value}\n'
+    return result
+
+
+def timed(render):
+    start = time.perf_counter()
+    render()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    for size in (10, 10_000, 100_000):
+        fields = [(f'field_{i}', str(i)) for i in range(size)]
+        cb = exc_code_builder.CodeBuilder('Wide')
+        sb = solution.CodeBuilder('Wide')
+        for field, value in fields:
+            cb.add_field(field, value)
+            sb.add_field(field, value)
+        print(f'{size} fields:')
+        print(f'  += concatenation:        {timed(lambda: concat_render("Wide", fields)):.4f}s')
+        print(f'  exc_code_builder join:   {timed(lambda: str(cb)):.4f}s')
+        print(f'  solution join:           {timed(lambda: str(sb)):.4f}s')
+
+    builders = []
+    for n in range(1_000):
+        cb = exc_code_builder.CodeBuilder(f'Record{n}')
+        for i in range(100):
+            cb.add_field(f'field_{i}', str(i))
+        builders.append(cb)
+    out = io.StringIO()
+    print(f'module of 1000 classes x 100 fields: {timed(lambda: exc_code_builder.write_module(builders, out)):.4f}s')
@@ -3,8 +3,19 @@
 
 # Вывод: идея с дочерними строителями, заключается в том, что мы им можем дать базовый класс (PersonBuilder),
 # и у базового класса может быть красивый текучий интерфейс для перехода от одного строителя к другому
+from operator import itemgetter
+
+from object_pool import ObjectPool
+
+
 class Person:
+    # Без __dict__ объект меньше и создается быстрее - это важно, когда записей миллионы
+    __slots__ = ('street_address', 'postcode', 'city', 'company_name', 'position', 'annual_income')
+
     def __init__(self):
+        self.reset()
+
+    def reset(self):
         self.street_address = None
         self.postcode = None
         self.city = None
@@ -19,25 +30,136 @@ class Person:
 
 
 class PersonBuilder:
-    def __init__(self, person=Person()):    # Этот трюк позволяет строителям работать уже с созданным объектом Person,
-                                            # а не строить новых. Мы избегаем лишних повторов и инициализаций.
-        self.person = person
+    # Дочерние строители получают уже созданный объект Person, а не строят новый.
+    # Значение по умолчанию person=Person() здесь использовать нельзя: оно вычисляется один раз при объявлении
+    # функции, и все строители работали бы с одним и тем же объектом. Поэтому каждый новый строитель берет
+    # свой объект - из пула, если он передан, или создает новый.
+    # Объект из пула выдается строителю под маркером lease, который дочерние строители получают вместе с ним.
+    def __init__(self, person=None, pool=None, lease=None):
+        if person is None and pool is not None:
+            lease = object()
+            person = pool.acquire(lease)
+        self.person = person if person is not None else Person()
+        self.pool = pool
+        self.lease = lease
 
     @property
     def works(self):
-        return PersonJobBuilder(self.person)
+        return PersonJobBuilder(self.person, self.pool, self.lease)
 
     @property
     def lives(self):
-        return PersonAddressBuilder(self.person)
+        return PersonAddressBuilder(self.person, self.pool, self.lease)
 
     def build(self):
         return self.person
 
+    def release(self):
+        """Возвращает объект в пул. После этого ни строитель, ни построенный объект использовать нельзя."""
+        self.pool.release(self.person, self.lease)
+        self.person = None
+
+    # Массовое построение. Цепочка PersonBuilder().lives.at(...).works.at(...) - это десяток вызовов и
+    # промежуточные строители на каждую запись. Для потока строк (кортежи, словари, вывод csv.reader или
+    # csv.DictReader) сопоставление "шаг цепочки -> колонка" проверяется один раз, а дальше значения
+    # раскладываются по объектам за один проход:
+    #   PersonBuilder.build_many(rows, {'lives.in_city': 0, 'works.at': 1})
+    @classmethod
+    def build_many(cls, rows, mapping, pool=None):
+        """Отдает по объекту Person на каждую строку; mapping - {'строитель.метод': номер или ключ колонки}."""
+        make = _row_constructor(*_compile_mapping(mapping))
+        if pool is not None:
+            return (make(row, pool.acquire()) for row in rows)
+        new = Person.__new__
+        return (make(row, new(Person)) for row in rows)
+
+    @classmethod
+    def build_columns(cls, rows, mapping):
+        """Строит колоночную пачку PersonBatch: по списку значений на поле вместо объекта на строку."""
+        fields, sources = _compile_mapping(mapping)
+        if not sources:
+            # Как и build_many, пустое сопоставление дает людей без заполненных полей - по одному на строку
+            return PersonBatch({}, sum(1 for _ in rows))
+        if len(sources) == 1:
+            columns = [[row[sources[0]] for row in rows]]
+        else:
+            columns = list(map(list, zip(*map(itemgetter(*sources), rows)))) or [[] for _ in fields]
+        return PersonBatch(dict(zip(fields, columns)))
+
+
+_probe_value = object()
+
+
+def _compile_mapping(mapping):
+    # Каждый шаг проверяем так же, как его проверил бы текучий интерфейс: строитель и метод должны существовать.
+    # Шаги - это только методы, объявленные в самом строителе фасета (at, as_a, ...), а не унаследованные
+    # от PersonBuilder (works, lives, build, release, build_many...).
+    # Поле, которое заполняет метод, узнаем, вызвав его один раз на пробном объекте.
+    fields, sources = [], []
+    for step, source in mapping.items():
+        builder_name, _, method_name = step.partition('.')
+        if builder_name not in ('works', 'lives'):
+            raise ValueError(f'Unknown builder in {step!r}, available: works, lives')
+        builder = getattr(PersonBuilder(Person()), builder_name)
+        steps = [name for name, value in vars(type(builder)).items()
+                 if not name.startswith('_') and callable(value)]
+        if method_name not in steps:
+            raise ValueError(f'{type(builder).__name__} has no step {method_name!r}, available: {", ".join(steps)}')
+        getattr(builder, method_name)(_probe_value)
+        field = next((name for name in Person.__slots__ if getattr(builder.person, name) is _probe_value), None)
+        if field is None:
+            raise ValueError(f'Step {step!r} does not set any field of Person')
+        if field in fields:
+            raise ValueError(f'Field {field!r} is mapped twice')
+        fields.append(field)
+        sources.append(source)
+    return fields, sources
+
+
+def _row_constructor(fields, sources):
+    # Как и CodeBuilder.build_class, генерируем и компилируем функцию под конкретное сопоставление:
+    # одно присваивание на поле вместо цикла с setattr. Немапированные поля получают None, как после reset.
+    values = dict.fromkeys(Person.__slots__, 'None')
+    for i, (field, source) in enumerate(zip(fields, sources)):
+        values[field] = f'row[{source!r}]' if type(source) in (int, str) else f'row[sources[{i}]]'
+    source = (
+        'def make(row, person):\n'
+        f'    {", ".join(f"person.{field}" for field in values)} = {", ".join(values.values())}\n'
+        '    return person\n'
+    )
+    namespace = {'sources': tuple(sources)}
+    exec(source, namespace)
+    return namespace['make']
+
+
+class PersonBatch:
+    """Колоночное представление многих Person: columns[поле][номер строки]."""
+    def __init__(self, columns, size=None):
+        self.columns = columns
+        self.size = len(next(iter(columns.values()), ())) if size is None else size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        person = Person()
+        for field, column in self.columns.items():
+            setattr(person, field, column[index])
+        return person
+
+    def __iter__(self):
+        return (self[i] for i in range(self.size))
+
+
+def person_pool(max_size=1024):
+    """Пул объектов Person. Объект, взятый строителем, возвращается через builder.release(),
+    а взятый напрямую (pool.acquire() или build_many) - через pool.release(person)."""
+    return ObjectPool(Person, max_size)
+
 
 class PersonJobBuilder(PersonBuilder):
-    def __init__(self, person):
-        super().__init__(person)
+    def __init__(self, person, pool=None, lease=None):
+        super().__init__(person, pool, lease)
 
     def at(self, company_name):
         self.person.company_name = company_name
@@ -53,8 +175,8 @@ class PersonJobBuilder(PersonBuilder):
 
 
 class PersonAddressBuilder(PersonBuilder):
-    def __init__(self, person):
-        super().__init__(person)
+    def __init__(self, person, pool=None, lease=None):
+        super().__init__(person, pool, lease)
 
     def at(self, street_address):
         self.person.street_address = street_address
@@ -69,15 +191,38 @@ class PersonAddressBuilder(PersonBuilder):
         return self
 
 
-pb = PersonBuilder()
-person = pb\
-    .lives\
-        .at('123 London Road')\
-        .in_city('London')\
-        .with_postcode('123456')\
-    .works\
-        .at('Google')\
-        .as_a('Developer')\
-        .earning(55555)\
-    .build()
-print(person)
+if __name__ == '__main__':
+    pb = PersonBuilder()
+    person = pb\
+        .lives\
+            .at('123 London Road')\
+            .in_city('London')\
+            .with_postcode('123456')\
+        .works\
+            .at('Google')\
+            .as_a('Developer')\
+            .earning(55555)\
+        .build()
+    print(person)
+
+    # Каждый строитель работает со своим объектом
+    print(PersonBuilder().build() is PersonBuilder().build())
+
+    # Режим с пулом: объекты переиспользуются, а не создаются заново на каждую запись
+    pool = person_pool(max_size=16)
+    for i in range(10_000):
+        builder = PersonBuilder(pool=pool)
+        person = builder.works.at('Google').earning(i).build()
+        # ... запись обработана, объект больше не нужен
+        builder.release()
+    print(pool.stats())
+
+    # Массовое построение из строк csv
+    import csv
+    import io
+    rows = csv.reader(io.StringIO('London,Google,Developer\nParis,Airbus,Engineer\n'))
+    for person in PersonBuilder.build_many(rows, {'lives.in_city': 0, 'works.at': 1, 'works.as_a': 2}):
+        print(person)
+    batch = PersonBuilder.build_columns([{'city': 'Berlin', 'income': 100}], {'lives.in_city': 'city',
+                                                                             'works.earning': 'income'})
+    print(batch.columns, batch[0].city)
@@ -12,7 +12,9 @@
 # cb = CodeBuilder('Foo')
 # class Foo:
 #     pass
-from typing import List
+import ast
+import keyword
+from typing import Dict, List, Tuple
 
 
 class Code:
@@ -22,23 +24,103 @@ class Code:
         self.name: str = name
         self.attributes: List[tuple] = []
 
-    def create_init_body(self):
+    # Код собирается списком кусков, без склеивания строк через += - так время линейно по числу полей даже
+    # для классов на сотни тысяч полей. write_to пишет куски в любой объект с методом write (файл,
+    # io.StringIO), а __str__ склеивает их одним ''.join.
+    def init_body_lines(self):
         indent = ' ' * self.indent_size * 2
-        result = f'{" " * self.indent_size}def __init__(self):\n'
-        for elem in self.attributes:
-            result += f'{indent}self.{elem[0]} = {elem[1]}\n'
-        return result
+        lines = [f'{" " * self.indent_size}def __init__(self):\n']
+        lines += [f'{indent}self.{name} = {value}\n' for name, value in self.attributes]
+        return lines
+
+    def create_init_body(self):
+        return ''.join(self.init_body_lines())
+
+    def lines(self):
+        if len(self.attributes) != 0:
+            return [f'class {self.name}:\n', *self.init_body_lines()]
+        return [f'class {self.name}:\n', f'{" " * self.indent_size}pass']
+
+    def write_to(self, out):
+        out.writelines(self.lines())
 
     def __str(self):
-        header = f'class {self.name}:\n'
-        init_body = self.create_init_body() if len(self.attributes) != 0 else f'{" " * self.indent_size}pass'
-        return header + init_body
+        return ''.join(self.lines())
 
     def __str__(self):
         return self.__str()
 
+    @staticmethod
+    def is_immutable_literal(value):
+        """Значение можно сделать значением по умолчанию параметра, только если это неизменяемый литерал."""
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return False
+        return isinstance(value, (str, bytes, int, float, complex, bool, type(None)))
+
+    def create_class_source(self, slots=False, positional=False):
+        """Исходник класса для компиляции: опционально со __slots__ и __init__, принимающим поля позиционно."""
+        if not slots and not positional:
+            return str(self)
+        indent = ' ' * self.indent_size
+        lines = [f'class {self.name}:\n']
+        if slots:
+            names = ''.join(f'{elem[0]!r}, ' for elem in self.attributes)
+            lines.append(f'{indent}__slots__ = ({names})\n')
+        if not positional:
+            if self.attributes:
+                lines.extend(self.init_body_lines())
+            return ''.join(lines)
+        if not self.attributes:
+            if not slots:
+                lines.append(f'{indent}pass')
+            return ''.join(lines)
+        # Изменяемые значения (например, []) нельзя подставить в сигнатуру - они стали бы общими для всех
+        # объектов, поэтому для них используется маркер _missing и значение вычисляется при каждом вызове
+        params, body = [], []
+        for name, value in self.attributes:
+            if self.is_immutable_literal(value):
+                params.append(f'{name}={value}')
+                body.append(f'{indent * 2}self.{name} = {name}\n')
+            else:
+                params.append(f'{name}=_missing')
+                body.append(f'{indent * 2}self.{name} = ({value}) if {name} is _missing else {name}\n')
+        lines.append(f'{indent}def __init__(self, {", ".join(params)}):\n')
+        lines.extend(body)
+        return ''.join(lines)
+
+def validate_class(name, fields):
+    """Проверяет, что из имени класса и пар (поле, значение) получится корректный код, иначе ValueError:
+    имена - идентификаторы и не ключевые слова, поля не повторяются, значения - выражения Python."""
+    if not isinstance(name, str) or not name.isidentifier() or keyword.iskeyword(name):
+        raise ValueError(f'Invalid class name: {name!r}')
+    seen = set()
+    for field, value in fields:
+        if not isinstance(field, str) or not field.isidentifier() or keyword.iskeyword(field):
+            raise ValueError(f'Invalid field name in {name}: {field!r}')
+        if field in seen:
+            raise ValueError(f'Duplicate field name in {name}: {field!r}')
+        seen.add(field)
+        try:
+            ast.parse(value, mode='eval')
+        except SyntaxError:
+            raise ValueError(f'Invalid value of {name}.{field}: {value!r}') from None
+
+
+def write_module(codes, out):
+    """Пишет много классов (Code или CodeBuilder) в один модуль за один проход."""
+    for n, code in enumerate(codes):
+        if n:
+            out.write('\n\n\n')
+        code.write_to(out)
+    out.write('\n')
+
 
 class CodeBuilder:
+    # Один раз скомпилированные классы: (имя, поля, __slots__, позиционный __init__) -> тип
+    _class_cache: Dict[Tuple, type] = {}
+
     def __init__(self, root_name):
         self.root_name: str = root_name
         self.__root = Code(name=root_name)
@@ -50,9 +132,31 @@ class CodeBuilder:
     def __str__(self):
         return str(self.__root)
 
+    def write_to(self, out):
+        self.__root.write_to(out)
+
+    def build_class(self, slots=False, positional=False):
+        """Компилирует класс из сгенерированного кода. Класс той же формы второй раз не компилируется."""
+        key = (self.root_name, tuple(self.__root.attributes), slots, positional)
+        cls = self._class_cache.get(key)
+        if cls is None:
+            validate_class(self.root_name, self.__root.attributes)
+            namespace = {'_missing': object()}
+            exec(self.__root.create_class_source(slots, positional), namespace)
+            cls = self._class_cache[key] = namespace[self.root_name]
+        return cls
+
+
+if __name__ == '__main__':
+    cb = CodeBuilder('Person').add_field('name', '""').add_field('age', '0')
+    print(cb)
+    print('EMPTY::')
+    empty_cd = CodeBuilder('Foo')
+    print(empty_cd)
 
-cb = CodeBuilder('Person').add_field('name', '""').add_field('age', '0')
-print(cb)
-print('EMPTY::')
-empty_cd = CodeBuilder('Foo')
-print(empty_cd)
+    # Класс можно сразу получить готовым, а не вызывать exec самому
+    Person = cb.build_class(slots=True, positional=True)
+    p = Person('Mikhail', 30)
+    print('COMPILED::', type(p).__name__, p.name, p.age)
+    same = CodeBuilder('Person').add_field('name', '""').add_field('age', '0').build_class(slots=True, positional=True)
+    print('Cached class reused:', same is Person)
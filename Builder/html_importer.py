@@ -0,0 +1,112 @@
+# До сих пор дерево HtmlElement можно было получить только собрав его руками через HtmlBuilder.
+# Импортер строит такое же дерево из готового html с помощью html.parser из стандартной библиотеки.
+# Парсер потоковый: данные подаются кусками, а элементы создаются по мере чтения тегов.
+# Для очень больших документов есть режим с ограниченной памятью: поддеревья на заданной глубине отдаются
+# сразу после закрывающего тега и к родителю не прикрепляются, поэтому в памяти живет только текущее поддерево.
+# HtmlElement хранит только имя и текст, поэтому атрибуты тегов отбрасываются, а текст элемента - это все его
+# текстовые куски, склеенные через пробел (при печати текст идет перед вложенными элементами).
+from html.parser import HTMLParser
+
+from simple_builder import HtmlBuilder, HtmlElement
+
+
+class HtmlImporter(HTMLParser):
+    # Элементы, у которых не бывает закрывающего тега
+    void_elements = frozenset((
+        'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr',
+    ))
+
+    def __init__(self, emit_depth=None):
+        super().__init__()
+        self.emit_depth = emit_depth    # None - строим дерево целиком
+        self.roots = []
+        self.completed = []             # поддеревья, готовые к выдаче в режиме emit_depth
+        self.stack = []
+
+    def handle_starttag(self, tag, attrs):
+        element = HtmlElement(tag)
+        depth = len(self.stack)
+        if depth == self.emit_depth:
+            pass    # поддерево будет отдано целиком после закрытия и к родителю не прикрепляется
+        elif not self.stack:
+            self.roots.append(element)
+        else:
+            self.stack[-1].append(element)
+        self.stack.append(element)
+        if tag in self.void_elements:
+            self._close()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self.void_elements:
+            self._close()
+
+    def handle_endtag(self, tag):
+        if tag in self.void_elements:
+            return
+        # Незакрытые вложенные теги закрываем неявно; лишний закрывающий тег игнорируем
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i].name == tag:
+                while len(self.stack) > i:
+                    self._close()
+                return
+
+    def handle_data(self, data):
+        text = data.strip()
+        if text and self.stack:
+            element = self.stack[-1]
+            element.text = f'{element.text} {text}' if element.text else text
+
+    def _close(self):
+        element = self.stack.pop()
+        if len(self.stack) == self.emit_depth:
+            self.completed.append(element)
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._close()
+
+
+def parse_html(source):
+    """Разбирает html-строку и возвращает список корневых элементов."""
+    importer = HtmlImporter()
+    importer.feed(source)
+    importer.close()
+    return importer.roots
+
+
+def builder_for(element):
+    """Строитель поверх уже готового элемента, чтобы дальше работать с ним через API HtmlBuilder."""
+    return HtmlBuilder(element.name, root=element)
+
+
+def iter_subtrees(fp, depth=1, chunk_size=1 << 16):
+    """Читает html из файла кусками и отдает поддеревья на глубине depth сразу после их закрытия."""
+    importer = HtmlImporter(emit_depth=depth)
+    while True:
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            break
+        importer.feed(chunk)
+        yield from importer.completed
+        importer.completed.clear()
+    importer.close()
+    yield from importer.completed
+
+
+if __name__ == '__main__':
+    import io
+
+    source = '<ul><li>hello</li><li>world &amp; friends<br></li><li><b>bold</b> text</li></ul>'
+    root, = parse_html(source)
+    builder = builder_for(root)
+    builder.add_child('li', 'added after import')
+    print(builder)
+
+    # Поток из большого документа: каждый <li> приходит отдельно и сразу может быть обработан
+    big = io.StringIO('<ul>' + ''.join(f'<li>item {i}</li>' for i in range(100_000)) + '</ul>')
+    count = 0
+    for li in iter_subtrees(big, depth=1, chunk_size=4096):
+        count += 1
+    print(f'Streamed {count} <li> subtrees, last one:\n{li}')
@@ -0,0 +1,91 @@
+# Сравнение скорости печати HtmlElement: исходный рекурсивный __str (render_recursive) против итеративной печати по шаблонам
+# (без кеша, с кешем на первом проходе и при повторной печати неизмененного дерева).
+import time
+
+from simple_builder import HtmlBuilder, HtmlElement
+
+
+def build_page(sections, items):
+    page = HtmlBuilder('div')
+    for s in range(sections):
+        page.add_child_builder('ul').add_children(('li', f'item {s}.{i} & more') for i in range(items))
+    return page
+
+
+def render_recursive(element, indent=0):
+    # Исходная рекурсивная печать HtmlElement.__str, оставлена здесь как эталон для сравнения.
+    # Текст не экранируется, как и в исходной версии.
+    lines = []
+    i = ' ' * (indent * element.indent_size)
+    lines.append(f'{i}<{element.name}>')
+
+    if element.text:
+        i1 = ' ' * ((indent + 1) * element.indent_size)
+        lines.append(f'{i1}{element.text}')
+
+    for e in element.elements:
+        lines.append(render_recursive(e, indent + 1))
+    lines.append(f'{i}</{element.name}>')
+    return '\n'.join(lines)
+
+
+def nodes_per_second(render, nodes, repeat=3):
+    best = min(_timed(render) for _ in range(repeat))
+    return nodes / best
+
+
+def drop_cache(root):
+    stack = [root]
+    while stack:
+        element = stack.pop()
+        HtmlElement.cache.drop(element)
+        stack.extend(element.elements)
+
+
+def _timed(render):
+    start = time.perf_counter()
+    render()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    sections, items = 100, 2_000
+    page = build_page(sections, items)
+    root = page._HtmlBuilder__root
+    nodes = 1 + sections * (1 + items)
+
+    HtmlElement.cache.enabled = False
+    legacy = nodes_per_second(lambda: render_recursive(root), nodes)
+    templated = nodes_per_second(lambda: str(page), nodes)
+    HtmlElement.cache.enabled = True
+    cold = nodes_per_second(lambda: (drop_cache(root), str(page)), nodes)
+    warm = nodes_per_second(lambda: str(page), nodes)
+
+    print(f'{nodes} nodes:')
+    print(f'  recursive __str:        {legacy:12,.0f} nodes/s')
+    print(f'  templates, no cache:    {templated:12,.0f} nodes/s')
+    print(f'  templates, cold cache:  {cold:12,.0f} nodes/s')
+    print(f'  templates, warm cache:  {warm:12,.0f} nodes/s')
+
+    # Одно изменение и повторная печать: с кешем заново собираются только фрагменты измененного элемента
+    # и его родителя
+    html = HtmlBuilder('html')
+    body = html.add_child_builder('body')
+    sections = [body.add_child_builder('section') for _ in range(100)]
+    for section in sections:
+        section.add_children(('li', f'item {i}') for i in range(50))
+    for enabled in (False, True):
+        HtmlElement.cache.enabled = enabled
+        str(html)
+        start = time.perf_counter()
+        sections[50].add_child('li', 'one more')
+        str(html)
+        print(f'  add_child + render, cache {"on" if enabled else "off"}: {(time.perf_counter() - start) * 1e3:.2f}ms')
+
+    # Построение глубокого дерева: append не поднимается к корню, поэтому время линейно по глубине
+    for depth in (10_000, 20_000):
+        start = time.perf_counter()
+        builder = HtmlBuilder('div')
+        for _ in range(depth):
+            builder = builder.add_child_builder('div')
+        print(f'  building depth {depth}: {time.perf_counter() - start:.3f}s')
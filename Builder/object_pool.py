@@ -0,0 +1,60 @@
+# Пул объектов для строителей, которые создают очень много однотипных объектов.
+# Обычно строитель на каждую сборку создает новый объект, и при большом потоке записей аллокатор и сборщик
+# мусора заняты созданием и уничтожением одних и тех же по форме объектов.
+# Идея:
+#   - пул хранит ограниченное число свободных объектов (max_size), лишние при возврате просто отбрасываются;
+#   - acquire отдает свободный объект или создает новый через factory, release сбрасывает объект методом reset
+#     и возвращает его в пул;
+#   - операции защищены блокировкой, поэтому один пул можно использовать из нескольких потоков;
+#   - каждый объект в один момент времени принадлежит только одному владельцу: пул помнит выданные объекты
+#     и их владельцев (owner - любой маркер, например object()). release объекта, который сейчас не выдан
+#     (повторный release или чужой объект), или release не тем владельцем - ошибка. Так опоздавший release
+#     прежнего владельца не может сбросить объект, который уже выдан следующему.
+# Пул окупается только для объектов, которые дорого создавать (соединения, большие буферы). Для маленького
+# объекта со __slots__, как Person из примеров строителей, блокировка и reset стоят дороже самого создания:
+# в person_builder_benchmark.py путь с пулом примерно вдвое медленнее, чем без него.
+import threading
+
+
+class ObjectPool:
+    """Ограниченный потокобезопасный пул объектов с методом reset()."""
+
+    def __init__(self, factory, max_size=1024):
+        self.factory = factory
+        self.max_size = max_size
+        self.created = 0
+        self.reused = 0
+        self._free = []
+        self._in_use = {}       # id выданного объекта -> владелец
+        self._lock = threading.Lock()
+
+    def acquire(self, owner=None):
+        with self._lock:
+            if self._free:
+                obj = self._free.pop()
+                self._in_use[id(obj)] = owner
+                self.reused += 1
+                return obj
+            self.created += 1
+        obj = self.factory()
+        with self._lock:
+            self._in_use[id(obj)] = owner
+        return obj
+
+    def release(self, obj, owner=None):
+        with self._lock:
+            if id(obj) not in self._in_use:
+                raise ValueError(f'{obj!r} was not acquired from this pool or is already released')
+            if self._in_use[id(obj)] is not owner:
+                raise ValueError(f'{obj!r} is held by another owner')
+            del self._in_use[id(obj)]
+        obj.reset()     # объект уже никому не выдан, поэтому сбрасывается вне блокировки
+        with self._lock:
+            if len(self._free) < self.max_size:
+                self._free.append(obj)
+
+    def __len__(self):
+        return len(self._free)
+
+    def stats(self):
+        return {'created': self.created, 'reused': self.reused, 'free': len(self), 'in_use': len(self._in_use)}
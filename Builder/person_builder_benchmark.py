@@ -0,0 +1,41 @@
+# Замер массового построения Person: текучая цепочка строителей против PersonBuilder.build_many
+# и колоночной пачки PersonBuilder.build_columns. Размер задается аргументом: python person_builder_benchmark.py 1000000
+import sys
+import time
+
+from combning_builders_via_inteface import PersonBuilder, person_pool
+
+MAPPING = {'lives.at': 0, 'lives.with_postcode': 1, 'lives.in_city': 2, 'works.at': 3, 'works.as_a': 4,
+           'works.earning': 5}
+
+
+def fluent(rows):
+    return [
+        PersonBuilder()
+        .lives.at(street).with_postcode(postcode).in_city(city)
+        .works.at(company).as_a(position).earning(income)
+        .build()
+        for street, postcode, city, company, position, income in rows
+    ]
+
+
+def pooled(rows):
+    pool = person_pool()
+    for person in PersonBuilder.build_many(rows, MAPPING, pool=pool):
+        pool.release(person)    # запись обработана и сразу возвращена в пул
+    return pool.stats()
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = [(f'{i} Main Street', f'{i % 100_000:06}', 'London', 'Google', 'Developer', i) for i in range(n)]
+    for title, build in (
+            ('fluent chain', fluent),
+            ('build_many', lambda r: list(PersonBuilder.build_many(r, MAPPING))),
+            ('build_many + pool', pooled),
+            ('build_columns', lambda r: PersonBuilder.build_columns(r, MAPPING)),
+    ):
+        start = time.perf_counter()
+        build(rows)
+        elapsed = time.perf_counter() - start
+        print(f'{title}: {elapsed:.3f}s, {n / elapsed / 1e6:.2f}M records/s')
@@ -0,0 +1,224 @@
+# Пакетная генерация классов по схеме поверх CodeBuilder из exc_code_builder.
+# CodeBuilder строит один класс цепочкой add_field, а здесь классов сотни и они описаны в файле.
+# Идея:
+#   - схема читается потоково: JSONL (по классу на строку), CSV (строки class,field,value, строки одного
+#     класса идут подряд) или обычный JSON со списком классов;
+#   - классы одинаковой формы (одни и те же поля с теми же значениями) генерируются один раз,
+#     остальные становятся псевдонимами первого: Employee = Person;
+#   - перед каждым классом в модуле стоит маркер с sha256 его описания. При повторной генерации классы,
+#     у которых хеш не изменился, берутся из старого модуля как есть, а заново строятся только измененные;
+#   - построение кода раздается пулу процессов частями, если классов для построения много;
+#   - модуль записывается атомарно: во временный файл рядом, затем os.replace. Временный файл получает права
+#     прежнего модуля (или обычные права нового файла с учетом umask), а не 0600 от mkstemp.
+# Формат одного класса в JSONL/JSON: {"name": "Person", "fields": [["name", "\"\""], ["age", "0"]]}
+# (поля можно задать и объектом {"name": "\"\"", "age": "0"}).
+import csv
+import hashlib
+import io
+import json
+import os
+import stat
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+from exc_code_builder import CodeBuilder, validate_class, write_module
+
+GenerationStats = namedtuple('GenerationStats', ['classes', 'rendered', 'reused', 'aliases', 'written'])
+
+MARKER = '# codegen: '
+HEADER = '# Сгенерировано schema_codegen.py по схеме, не редактировать вручную.\n\n\n'
+
+
+class Block:
+    """Готовый кусок модуля: маркер и код класса или псевдонима."""
+    def __init__(self, name, digest, text):
+        self.name = name
+        self.digest = digest
+        self.text = text
+
+    def write_to(self, out):
+        out.write(self.text)
+
+
+def _class_from_json(data):
+    fields = data.get('fields', ())
+    if isinstance(fields, dict):
+        fields = fields.items()
+    return data['name'], tuple((str(field), str(value)) for field, value in fields)
+
+
+def iter_schema(filename):
+    """Отдает описания классов (имя, ((поле, значение), ...)) по мере чтения файла схемы."""
+    extension = os.path.splitext(filename)[1].lower()
+    with open(filename, newline='', encoding='utf-8') as file:
+        if extension == '.jsonl':
+            for line in file:
+                if line.strip():
+                    yield _class_from_json(json.loads(line))
+        elif extension == '.csv':
+            for name, rows in groupby(csv.DictReader(file), key=lambda row: row['class']):
+                yield name, tuple((row['field'], row['value']) for row in rows if row['field'])
+        elif extension == '.json':
+            for data in json.load(file):
+                yield _class_from_json(data)
+        else:
+            raise ValueError(f'Unknown schema format: {filename!r}')
+
+
+def _digest(name, fields, alias_of=None):
+    return hashlib.sha256(json.dumps([name, fields, alias_of]).encode()).hexdigest()
+
+
+def _render(shapes):
+    # Выполняется в рабочем процессе: строит код пачки классов через CodeBuilder
+    result = []
+    for name, fields in shapes:
+        builder = CodeBuilder(name)
+        for field, value in fields:
+            builder.add_field(field, value)
+        out = io.StringIO()
+        builder.write_to(out)
+        result.append(out.getvalue())
+    return result
+
+
+def read_blocks(text):
+    """Разбирает текст ранее сгенерированного модуля на блоки: имя -> Block."""
+    blocks = {}
+    for chunk in text.split('\n' + MARKER)[1:]:
+        marker, _, body = chunk.partition('\n')
+        name, digest = marker.split()[:2]
+        blocks[name] = Block(name, digest, f'{MARKER}{marker}\n{body.rstrip()}')
+    return blocks
+
+
+def _file_mode(filename):
+    # Права, которые останутся у модуля после os.replace: как у заменяемого файла, а для нового - как у open()
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _write_atomic(filename, text):
+    directory = os.path.dirname(os.path.abspath(filename))
+    mode = _file_mode(filename)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.codegen-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(text)
+            file.flush()
+            os.fchmod(file.fileno(), mode)
+            os.fsync(file.fileno())
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def generate_module(schema, module, workers=None, chunk_size=64, parallel_threshold=256):
+    """Генерирует модуль с классами из схемы (имя файла или итерируемое описаний классов).
+
+    Перестраиваются только новые и измененные классы; если код модуля не изменился, файл не переписывается.
+    """
+    classes = iter_schema(schema) if isinstance(schema, str) else schema
+    try:
+        with open(module, encoding='utf-8') as file:
+            old_text = file.read()
+    except FileNotFoundError:
+        old_text = None
+    old_blocks = read_blocks(old_text) if old_text else {}
+    shapes = {}         # поля -> имя первого класса такой формы
+    seen = {}           # имя -> поля
+    blocks = []         # Block или номер в списке to_render
+    to_render = []
+    reused = aliases = 0
+    for name, fields in classes:
+        fields = tuple(fields)
+        if name in seen:
+            if seen[name] != fields:
+                raise ValueError(f'Class {name!r} is defined twice with different fields')
+            continue
+        # Та же проверка, что и в CodeBuilder.build_class: модуль с такими классами должен импортироваться
+        validate_class(name, fields)
+        seen[name] = fields
+        alias_of = shapes.setdefault(fields, name)
+        if alias_of == name:
+            alias_of = None
+        digest = _digest(name, fields, alias_of)
+        old = old_blocks.get(name)
+        if old is not None and old.digest == digest:
+            blocks.append(old)
+            reused += 1
+        elif alias_of is not None:
+            blocks.append(Block(name, digest, f'{MARKER}{name} {digest} alias\n{name} = {alias_of}'))
+        else:
+            blocks.append(len(to_render))
+            to_render.append((name, fields))
+        aliases += alias_of is not None
+
+    chunks = [to_render[i:i + chunk_size] for i in range(0, len(to_render), chunk_size)]
+    if len(to_render) >= parallel_threshold and workers != 1:
+        with ProcessPoolExecutor(workers) as pool:
+            rendered = [code for chunk in pool.map(_render, chunks) for code in chunk]
+    else:
+        rendered = [code for chunk in chunks for code in _render(chunk)]
+    for i, block in enumerate(blocks):
+        if isinstance(block, int):
+            name, fields = to_render[block]
+            digest = _digest(name, fields)
+            blocks[i] = Block(name, digest, f'{MARKER}{name} {digest}\n{rendered[block].rstrip()}')
+
+    out = io.StringIO()
+    out.write(HEADER)
+    write_module(blocks, out)
+    text = out.getvalue()
+    written = text != old_text
+    if written:
+        _write_atomic(module, text)
+    return GenerationStats(len(blocks), len(to_render), reused, aliases, written)
+
+
+if __name__ == '__main__':
+    import importlib.util
+    import time
+
+    directory = tempfile.mkdtemp()
+    schema = os.path.join(directory, 'schema.jsonl')
+    module = os.path.join(directory, 'generated_models.py')
+
+    def write_schema(count, changed=()):
+        with open(schema, 'w', encoding='utf-8') as file:
+            for i in range(count):
+                # model_id повторяется каждые 4500 классов - такие классы станут псевдонимами
+                fields = [['model_id', str(i % 4_500)]] + [[f'field_{j}', str(j)] for j in range(i % 20)]
+                if i in changed:
+                    fields.append(['extra', '[]'])
+                file.write(json.dumps({'name': f'Model{i}', 'fields': fields}) + '\n')
+
+    write_schema(5_000)
+    start = time.perf_counter()
+    print('first run:', generate_module(schema, module), f'{time.perf_counter() - start:.3f}s')
+    start = time.perf_counter()
+    print('unchanged:', generate_module(schema, module), f'{time.perf_counter() - start:.3f}s')
+    write_schema(5_000, changed={3, 500})
+    print('two changed:', generate_module(schema, module))
+
+    spec = importlib.util.spec_from_file_location('generated_models', module)
+    models = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(models)
+    print('Model3().extra =', models.Model3().extra, '| Model4501 is Model1:', models.Model4501 is models.Model1)
+
+    # CSV-схема: строки одного класса идут подряд, класс без полей - строка с пустым field
+    csv_schema = os.path.join(directory, 'schema.csv')
+    with open(csv_schema, 'w', encoding='utf-8') as file:
+        file.write('class,field,value\nPerson,name,""""""\nPerson,age,0\nEmployee,name,""""""\nEmployee,age,0\nFoo,,\n')
+    os.chmod(module, 0o640)
+    generate_module(csv_schema, module)
+    print('mode after regeneration:', oct(stat.S_IMODE(os.stat(module).st_mode)))
+    with open(module, encoding='utf-8') as file:
+        print(file.read())
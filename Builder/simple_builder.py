@@ -1,48 +1,238 @@
 # Строитель - представляет лаконичный API для поэтапного конструирования сложного объекта
 # Пример: будем строить html-элементы
+import sys
 
-# Рассмотрим простой пример - создание абзаца
-text = 'hello'
-parts = ['<p>', text, '</p>']
-print(''.join(parts))
+if __name__ == '__main__':
+    # Рассмотрим простой пример - создание абзаца
+    text = 'hello'
+    parts = ['<p>', text, '</p>']
+    print(''.join(parts))
 
-# Рассмотрим более сложный сценарий - даны слова и будем создавать из них список
-words = ['hello', 'world']
-parts = ['<ul>']
-for w in words:
-    parts.append(f'  <li>{w}</li>')
-parts.append('</ul>')
-print('\n'.join(parts))
+    # Рассмотрим более сложный сценарий - даны слова и будем создавать из них список
+    words = ['hello', 'world']
+    parts = ['<ul>']
+    for w in words:
+        parts.append(f'  <li>{w}</li>')
+    parts.append('</ul>')
+    print('\n'.join(parts))
+
+
+# Кеш отрисованных фрагментов. Один на все элементы, чтобы его было удобно смотреть и отключать.
+# По умолчанию выключен: он нужен, когда один и тот же большой документ печатается много раз с мелкими правками.
+# Фрагмент элемента - это его теги и текст вместе с уже склеенной разметкой детей-листьев, а вложенные
+# элементы с детьми входят во фрагмент ссылкой на сам элемент и печатаются из своего фрагмента.
+# Поэтому разметка не копируется в фрагменты предков (память кеша порядка размера документа), а изменение
+# элемента сбрасывает только его фрагмент и фрагмент родителя - повторная печать стоит пропорционально
+# изменению плюс обходу элементов с детьми.
+class RenderCache:
+    def __init__(self):
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        # Байт в строках сохраненных фрагментов за вычетом сброшенных через invalidate. Это накопительный
+        # счетчик: фрагменты удаленных деревьев освобождаются вместе с элементами, но из него не вычитаются.
+        self.memory = 0
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @staticmethod
+    def _size(fragment):
+        return sys.getsizeof(fragment) + sum(sys.getsizeof(piece) for piece in fragment if type(piece) is str)
+
+    def store(self, element, indent, fragment):
+        if element._cache is None:
+            element._cache = {}
+        element._cache[indent] = fragment
+        self.memory += self._size(fragment)
+
+    def drop(self, element):
+        if element._cache:
+            for fragment in element._cache.values():
+                self.memory -= self._size(fragment)
+        element._cache = None
 
 
 # Builder
 class HtmlElement:
+    # Элементов в документе могут быть миллионы, поэтому без __dict__: так каждый объект заметно меньше.
+    # Имена тегов интернируются - миллион <li> ссылаются на одну строку 'li'.
+    __slots__ = ('name', 'text', 'elements', 'parent', '_cache')
     indent_size = 2
+    cache = RenderCache()
 
     def __init__(self, name='', text=''):
         self.text = text
-        self.name = name
-        self.elements = []
+        self.name = sys.intern(name)
+        self.elements = ()  # у листьев (а их большинство) нет своего списка; он появляется при первом append
+        self.parent = None
+        self._cache = None  # отступ -> отрисованный фрагмент, создается при первом сохранении
+
+    def append(self, element):
+        """Добавляет вложенный элемент. Кеш отрисовки этого элемента и его родителя становится грязным."""
+        element.parent = self
+        if self.elements:
+            self.elements.append(element)
+        else:
+            self.elements = [element]
+        self.invalidate()
+
+    def extend(self, elements):
+        """Добавляет много вложенных элементов сразу, кеш сбрасывается один раз."""
+        start = len(self.elements)
+        if not self.elements:
+            self.elements = []
+        self.elements.extend(elements)
+        for i in range(start, len(self.elements)):
+            self.elements[i].parent = self
+        self.invalidate()
+
+    def invalidate(self):
+        """Сбрасывает фрагменты элемента и его родителя (в родительский фрагмент разметка листа входит целиком).
+        После изменения text вручную тоже нужно вызвать invalidate(). Стоит O(1) при любой глубине дерева."""
+        if self._cache is not None:
+            self.cache.drop(self)
+        parent = self.parent
+        if parent is not None and parent._cache is not None:
+            self.cache.drop(parent)
+
+    # Рекурсивная печать (см. render_recursive в html_render_benchmark.py) на каждом уровне заново склеивает
+    # строки всех потомков (квадратичное копирование на глубоких деревьях), держит весь документ в памяти и
+    # упирается в предел рекурсии. Поэтому печать идет через итеративный обход, который отдает html кусками:
+    # их можно писать в файл по мере готовности.
+    # Если кеш включен, неизмененные элементы отдаются готовыми фрагментами, а для остальных фрагменты
+    # собираются и запоминаются - тогда повторная печать стоит пропорционально тому, что изменилось.
+    # Строки открывающего и закрывающего тегов и отступы не собираются заново для каждого элемента:
+    # они один раз строятся для пары (тег, глубина) и дальше берутся из шаблонов.
+    escape_text = True  # текст экранируется (&, <, >), чтобы он не мог сломать разметку
+    _templates = {}     # (тег, глубина) -> (открывающая строка, она же после перевода строки, закрывающая строка)
+    _text_prefixes = {}  # глубина -> перевод строки и отступ текста
+
+    @classmethod
+    def _template(cls, name, level):
+        template = cls._templates.get((name, level))
+        if template is None:
+            i = ' ' * (level * cls.indent_size)
+            template = cls._templates[name, level] = (f'{i}<{name}>', f'\n{i}<{name}>', f'\n{i}</{name}>')
+        return template
+
+    @classmethod
+    def _text_prefix(cls, level):
+        prefix = cls._text_prefixes.get(level)
+        if prefix is None:
+            prefix = cls._text_prefixes[level] = '\n' + ' ' * ((level + 1) * cls.indent_size)
+        return prefix
 
-    # Каждый html-элемент может иметь любое кол-во вложенных элементов.
-    # Ключевым элементом HtmlElement явл-ся возможность печатать самого себя.
-    # Распечатка включает также распечатку всех вложенных элементов.
-    def __str(self, indent):
-        lines = []
-        i = ' ' * (indent * self.indent_size)
-        lines.append(f'{i}<{self.name}>')
+    def iter_render(self, indent=0):
+        """Отдает html кусками. ''.join(...) совпадает с результатом рекурсивной печати (с учетом экранирования)."""
+        if not self.cache.enabled:
+            yield from self._iter_render_plain(indent)
+            return
+        ready = []
+        stack = [(iter(self._fragment(indent)), indent)]
+        while stack:
+            pieces, level = stack[-1]
+            for piece in pieces:
+                if type(piece) is str:
+                    ready.append(piece)
+                else:
+                    stack.append((iter(piece._fragment(level + 1)), level + 1))
+                    break
+            else:
+                stack.pop()
+            if len(ready) >= 1024:
+                yield ''.join(ready)
+                ready.clear()
+        yield ''.join(ready)
 
+    def _fragment(self, level):
+        # Кусок разметки элемента на глубине level: строки и ссылки на вложенные элементы с детьми
+        fragment = self._cache.get(level) if self._cache else None
+        if fragment is not None:
+            self.cache.hits += 1
+            return fragment
+        self.cache.misses += 1
+        templates, template, escape = self._templates, self._template, self._escape
+        parts = [template(self.name, level)[0]]
         if self.text:
-            i1 = ' ' * ((indent + 1) * self.indent_size)
-            lines.append(f'{i1}{self.text}')
+            parts.append(self._text_prefix(level))
+            parts.append(escape(self.text))
+        fragment = []
+        child_level = level + 1
+        for element in self.elements:
+            _, open_tag, close_tag = templates.get((element.name, child_level)) or template(element.name, child_level)
+            if element.elements:
+                parts.append('\n')
+                fragment.append(''.join(parts))
+                fragment.append(element)
+                parts = []
+            else:
+                parts.append(open_tag)
+                if element.text:
+                    parts.append(self._text_prefix(child_level))
+                    parts.append(escape(element.text))
+                parts.append(close_tag)
+        parts.append(template(self.name, level)[2])
+        fragment.append(''.join(parts))
+        fragment = tuple(fragment)
+        self.cache.store(self, level, fragment)
+        return fragment
 
-        for e in self.elements:
-            lines.append(e.__str(indent + 1))
-        lines.append(f'{i}</{self.name}>')
-        return '\n'.join(lines)
+    @classmethod
+    def _escape(cls, text):
+        if cls.escape_text:
+            return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        return text
+
+    def _iter_render_plain(self, indent):
+        # Путь без кеша: листья печатаются прямо во внутреннем цикле, а в стек попадают только
+        # итераторы по детям элементов, у которых дети есть
+        templates, template, prefixes = self._templates, self._template, self._text_prefixes
+        escape = self._escape
+        ready = []
+        append = ready.append
+
+        open_tag, _, close_tag = template(self.name, indent)
+        append(open_tag)
+        if self.text:
+            append(self._text_prefix(indent))
+            append(escape(self.text))
+        stack = [(iter(self.elements), indent + 1, close_tag)]
+        while stack:
+            children, level, close_tag = stack[-1]
+            for element in children:
+                _, open_tag, element_close = templates.get((element.name, level)) or template(element.name, level)
+                append(open_tag)
+                if element.text:
+                    append(prefixes.get(level) or self._text_prefix(level))
+                    append(escape(element.text))
+                if element.elements:
+                    stack.append((iter(element.elements), level + 1, element_close))
+                    break
+                append(element_close)
+                if len(ready) >= 4096:
+                    yield ''.join(ready)
+                    ready.clear()
+            else:
+                stack.pop()
+                append(close_tag)
+        yield ''.join(ready)
+
+    def write_to(self, fp, buffer_size=1 << 16):
+        """Пишет html в любой файлоподобный объект (файл, io.StringIO), сбрасывая буфер кусками."""
+        buffer, size = [], 0
+        for chunk in self.iter_render():
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= buffer_size:
+                fp.write(''.join(buffer))
+                buffer, size = [], 0
+        fp.write(''.join(buffer))
 
     def __str__(self):
-        return self.__str(0)
+        return ''.join(self.iter_render())
 
     # На последнем этапе(после создания строителя) мы можем создать статический метод, который упростит работу с API.
     # Это нужно для того, что бы клиент мог разобраться как работать с конструктором. "Как с этим работать и с чего
@@ -59,9 +249,9 @@ class HtmlElement:
 # элементы, Вы можете создать строителя. Это конструкция, которая может принять элемент и сконструировать его! Строитель
 # будет помогать в построении элемента с помощью определенного API
 class HtmlBuilder:
-    def __init__(self, root_name):
+    def __init__(self, root_name, root=None):
         self.root_name = root_name  # Элемент верхнего уровня
-        self.__root = HtmlElement(name=root_name)  # Экземпляр элемента, который мы создаем
+        self.__root = root if root is not None else HtmlElement(name=root_name)  # Экземпляр элемента, который мы создаем
         # Мы определили, что именно мы создаем __root, без прямого доступа к нему.
         # Но в какой-то момент доступ будет необходим.
 
@@ -69,10 +259,22 @@ class HtmlBuilder:
     def __str__(self):
         return str(self.__root)
 
+    def iter_render(self):
+        return self.__root.iter_render()
+
+    def write_to(self, fp):
+        self.__root.write_to(fp)
+
+    @staticmethod
+    def cache_stats():
+        cache = HtmlElement.cache
+        return {'enabled': cache.enabled, 'hits': cache.hits, 'misses': cache.misses,
+                'hit_ratio': cache.hit_ratio, 'memory': cache.memory}
+
     # Следующий этап - создание API с которым мы работаем
     def add_child(self, child_name, child_text):
         """Метод, который добавляет вложенный элемент к текущему __root, с определенным именем."""
-        self.__root.elements.append(
+        self.__root.append(
             HtmlElement(child_name, child_text)
         )
 
@@ -81,27 +283,64 @@ class HtmlBuilder:
     # Добавим следующий класс в API
     def add_child_fluent(self, child_name, child_text):
         """Метод, который добавляет вложенный элемент к текущему __root, с определенным именем и возвращает объект"""
-        self.__root.elements.append(
+        self.__root.append(
             HtmlElement(child_name, child_text)
         )
         return self     # Именно это позволяет строить цепочки вызовов
 
-builder = HtmlBuilder('ul')
-builder.add_child('li', 'hello')
-builder.add_child('li', 'world')
-print('Ordinary builder:')
-print(builder)
-builder_ext = HtmlBuilder('ul')
-builder_ext.add_child_fluent('li', 'chain')\
-    .add_child_fluent('li', 'creation')\
-    .add_child_fluent('li', 'test')
-print('Extended builder:')
-print(builder_ext)
-builder_alt = HtmlElement.create('ul')
-builder_alt.add_child_fluent('li', 'Creating') \
-    .add_child_fluent('li', 'from') \
-    .add_child_fluent('li', 'HtmlElement')
-print('builder from HtmlElement:')
-print(builder_alt)
+    # Строитель умеет добавлять детей пачкой и спускаться ниже корня
+    def add_children(self, children):
+        """Добавляет к __root все пары (имя, текст) из итерируемого объекта и возвращает объект"""
+        self.__root.extend(HtmlElement(child_name, child_text) for child_name, child_text in children)
+        return self
+
+    def add_child_builder(self, child_name, child_text=''):
+        """Добавляет вложенный элемент и возвращает строителя для него, чтобы строить следующий уровень"""
+        child = HtmlElement(child_name, child_text)
+        self.__root.append(child)
+        return HtmlBuilder(child_name, root=child)
+
+
+if __name__ == '__main__':
+    builder = HtmlBuilder('ul')
+    builder.add_child('li', 'hello')
+    builder.add_child('li', 'world')
+    print('Ordinary builder:')
+    print(builder)
+    builder_ext = HtmlBuilder('ul')
+    builder_ext.add_child_fluent('li', 'chain')\
+        .add_child_fluent('li', 'creation')\
+        .add_child_fluent('li', 'test')
+    print('Extended builder:')
+    print(builder_ext)
+    builder_alt = HtmlElement.create('ul')
+    builder_alt.add_child_fluent('li', 'Creating') \
+        .add_child_fluent('li', 'from') \
+        .add_child_fluent('li', 'HtmlElement')
+    print('builder from HtmlElement:')
+    print(builder_alt)
+
+    # Потоковая печать: документ пишется в файл кусками и не собирается в одну строку
+    import io
+    deep = HtmlBuilder('div')
+    for n in range(3):
+        deep.add_child('p', f'paragraph {n}')
+    out = io.StringIO()
+    deep.write_to(out)
+    print('Streaming render matches str():', out.getvalue() == str(deep))
 
+    # С включенным кешем повторная печать почти не изменившегося дерева берет готовые фрагменты
+    HtmlElement.cache.enabled = True
+    section = deep.add_child_builder('section')
+    section.add_children(('p', f'cached {n}') for n in range(3))
+    str(deep)
+    deep.add_child('p', 'one more paragraph')
+    str(deep)
+    print('Render cache:', HtmlBuilder.cache_stats())
+    HtmlElement.cache.enabled = False
 
+    # Пачкой и на нескольких уровнях
+    page = HtmlBuilder('div')
+    page.add_child('h1', 'Numbers')
+    page.add_child_builder('ul').add_children(('li', str(n)) for n in range(3))
+    print(page)
@@ -1,3 +1,7 @@
+import ast
+import keyword
+
+
 class Field:
     def __init__(self, name, value):
         self.value = value
@@ -12,18 +16,69 @@ class Class:
         self.name = name
         self.fields = []
 
+    def lines(self):
+        if not self.fields:
+            return ['class %s:\n' % self.name, '  pass']
+        lines = ['class %s:\n' % self.name, '  def __init__(self):']
+        lines += ['\n    self.%s = %s' % (f.name, f.value) for f in self.fields]
+        return lines
+
+    def write_to(self, out):
+        out.writelines(self.lines())
+
     def __str__(self):
+        return ''.join(self.lines())
+
+    def source(self, slots=False, positional=False):
         lines = ['class %s:' % self.name]
+        if slots:
+            lines.append('  __slots__ = (%s)' % ''.join('%r, ' % f.name for f in self.fields))
         if not self.fields:
-            lines.append('  pass')
-        else:
+            if not slots:
+                lines.append('  pass')
+        elif not positional:
             lines.append('  def __init__(self):')
             for f in self.fields:
                 lines.append('    %s' % f)
+        else:
+            # изменяемые значения по умолчанию вычисляются при каждом вызове, а не один раз в сигнатуре
+            params, body = [], []
+            for f in self.fields:
+                if immutable_literal(f.value):
+                    params.append('%s=%s' % (f.name, f.value))
+                    body.append('    self.%s = %s' % (f.name, f.name))
+                else:
+                    params.append('%s=_missing' % f.name)
+                    body.append('    self.%s = (%s) if %s is _missing else %s' % (f.name, f.value, f.name, f.name))
+            lines.append('  def __init__(self, %s):' % ', '.join(params))
+            lines.extend(body)
         return '\n'.join(lines)
 
 
+def immutable_literal(value):
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return False
+    return isinstance(value, (str, bytes, int, float, complex, bool, type(None)))
+
+
+def check_name(name, what):
+    if not isinstance(name, str) or not name.isidentifier() or keyword.iskeyword(name):
+        raise ValueError('Invalid %s name: %r' % (what, name))
+
+
+def write_module(classes, out):
+    for n, c in enumerate(classes):
+        if n:
+            out.write('\n\n\n')
+        c.write_to(out)
+    out.write('\n')
+
+
 class CodeBuilder:
+    class_cache = {}
+
     def __init__(self, root_name):
         self.__class = Class(root_name)
 
@@ -33,3 +88,25 @@ class CodeBuilder:
 
     def __str__(self):
         return self.__class.__str__()
+
+    def write_to(self, out):
+        self.__class.write_to(out)
+
+    def build_class(self, slots=False, positional=False):
+        key = (self.__class.name, tuple((f.name, f.value) for f in self.__class.fields), slots, positional)
+        if key not in self.class_cache:
+            check_name(self.__class.name, 'class')
+            names = [f.name for f in self.__class.fields]
+            for name in names:
+                check_name(name, 'field')
+            if len(set(names)) != len(names):
+                raise ValueError('Duplicate field names in %s' % self.__class.name)
+            for f in self.__class.fields:
+                try:
+                    ast.parse(f.value, mode='eval')
+                except SyntaxError:
+                    raise ValueError('Invalid value of %s: %r' % (f.name, f.value)) from None
+            namespace = {'_missing': object()}
+            exec(self.__class.source(slots, positional), namespace)
+            self.class_cache[key] = namespace[self.__class.name]
+        return self.class_cache[key]
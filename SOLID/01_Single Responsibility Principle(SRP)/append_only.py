@@ -0,0 +1,123 @@
+# Расширение SRP: дозапись журнала вместо полной перезаписи файла.
+# PersistenceManager.save_to_file собирает весь журнал в одну строку и каждый раз переписывает файл целиком,
+# т.е. на журнале из миллионов записей каждое сохранение стоит O(n) памяти и ввода-вывода.
+# Идея:
+#   - менеджер подписывается на журнал и копит новые записи в буфере;
+#   - буфер сбрасывается в конец файла (формат тот же, что у data/journal.txt - по записи на строку),
+#     а os.fsync вызывается раз в несколько сбросов, чтобы не платить за него на каждой записи;
+#   - удаление записи дописывается строкой-надгробием '-id'; загрузка пропускает удаленные записи;
+#   - загрузка - генератор, который читает файл построчно и не держит его в памяти целиком
+#     (первым проходом собираются только номера удаленных записей);
+#   - новый журнал продолжает нумерацию файла с last_id(): это наибольший номер в файле, включая удаленные
+#     записи, поэтому номера после удалений не повторяются (число живых записей для этого не годится).
+# Журнал по-прежнему ничего не знает о файлах: ответственность за хранение остается у менеджера.
+import os
+
+
+class AppendOnlyPersistenceManager:
+    """Класс дописывает новые записи журнала в конец файла."""
+    def __init__(self, filename, buffer_size=1000, fsync_every=10):
+        self.filename = filename
+        self.buffer_size = buffer_size      # сколько записей копить до сброса в файл
+        self.fsync_every = fsync_every      # раз во сколько сбросов вызывать os.fsync (0 - никогда)
+        self.pending = []
+        self.flushes = 0
+        self._file = None
+
+    def attach(self, journal):
+        journal.listeners.append(self.append)
+        return self
+
+    def append(self, entry_id, text):
+        # text is None - запись удалена из журнала
+        self.pending.append(f'-{entry_id}' if text is None else f'{entry_id}: {text}')
+        if len(self.pending) >= self.buffer_size:
+            self.flush()
+
+    def _open(self):
+        # Файл, записанный save_to_file, не заканчивается переводом строки - добавим его перед дозаписью
+        needs_newline = False
+        if os.path.exists(self.filename) and os.path.getsize(self.filename):
+            with open(self.filename, 'rb') as fh:
+                fh.seek(-1, os.SEEK_END)
+                needs_newline = fh.read(1) != b'\n'
+        file = open(self.filename, 'a', encoding='utf-8')
+        if needs_newline:
+            file.write('\n')
+        return file
+
+    def flush(self, sync=False):
+        if self.pending:
+            if self._file is None:
+                self._file = self._open()
+            self._file.write('\n'.join(self.pending))
+            self._file.write('\n')
+            self.pending.clear()
+            self._file.flush()
+            self.flushes += 1
+            sync = sync or (self.fsync_every and self.flushes % self.fsync_every == 0)
+        if sync and self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush(sync=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def load(filename):
+        """Лениво отдает записи журнала по одной, пропуская удаленные."""
+        with open(filename, encoding='utf-8') as fh:
+            removed = {line[1:].rstrip('\n') for line in fh if line.startswith('-')}
+            fh.seek(0)
+            for line in fh:
+                if line.startswith('-'):
+                    continue
+                line = line.rstrip('\n')
+                if removed and line.partition(':')[0] in removed:
+                    continue
+                yield line
+
+    @staticmethod
+    def last_id(filename):
+        """Наибольший номер записи в файле (с учетом удаленных), 0 - если файла нет или он пуст."""
+        try:
+            with open(filename, encoding='utf-8') as fh:
+                return max((int(line.partition(':')[0].lstrip('-')) for line in fh if line.strip()), default=0)
+        except FileNotFoundError:
+            return 0
+
+
+if __name__ == '__main__':
+    import shutil
+    import tempfile
+    from lesson import Journal
+
+    # Работаем с копией data/journal.txt, чтобы не портить файл урока
+    file = os.path.join(tempfile.mkdtemp(), 'journal.txt')
+    shutil.copy(r'../data/journal.txt', file)
+
+    j = Journal()
+    j.count = AppendOnlyPersistenceManager.last_id(file)
+    with AppendOnlyPersistenceManager(file, buffer_size=2).attach(j):
+        j.add_entry('I went to bed')
+        mistake = j.add_entry('I ate a bug again')
+        j.add_entry('I woke up')
+        j.add_entry('I worked again')
+        j.remove_entry(mistake)     # в файл допишется надгробие, и при загрузке запись пропадет
+
+    for entry in AppendOnlyPersistenceManager.load(file):
+        print(entry)
+
+    # Следующий сеанс продолжает нумерацию после удаленной записи, а не с числа живых записей
+    j = Journal()
+    j.count = AppendOnlyPersistenceManager.last_id(file)
+    with AppendOnlyPersistenceManager(file).attach(j):
+        print(f'next id: {j.add_entry("I went for a walk")}')
@@ -0,0 +1,146 @@
+# Расширение SRP: асинхронное сохранение журналов.
+# PersistenceManager.save_to_file синхронный и блокирует вызывающего на все время записи.
+# Идея:
+#   - запросы на сохранение от многих журналов складываются в очередь;
+#   - если журнал уже ждет записи в тот же файл, новый запрос присоединяется к ожидающему (coalescing):
+#     снимок журнала берется в момент записи, поэтому одна запись покрывает все накопившиеся изменения;
+#   - в цикле событий берется только дешевый снимок записей (list(journal)), а форматирование текста и сама
+#     запись идут в фоновом потоке, атомарно: во временный файл рядом, затем os.replace. Временный файл
+#     получает права прежнего файла (или обычные права нового файла с учетом umask), а не 0600 от mkstemp.
+#     Ошибка снимка или записи передается всем, кто ждет этого сохранения, и не останавливает обработку очереди;
+#   - глубина очереди и время записи доступны в stats(), чтобы видеть, не отстает ли сохранение.
+import asyncio
+import os
+import stat
+import tempfile
+import time
+
+
+class AsyncPersistenceManager:
+    """Класс сохраняет журналы в файлы, не блокируя цикл событий."""
+    def __init__(self, atomic=True):
+        self.atomic = atomic
+        self.pending = {}           # (id журнала, имя файла) -> [журнал, имя файла, ожидающие futures]
+        self._queue = None
+        self._worker = None
+        self.writes = 0
+        self.coalesced = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        return self
+
+    async def save_to_file(self, journal, filename):
+        """Ставит журнал в очередь на сохранение и ждет, пока он будет записан."""
+        self.start()
+        key = (id(journal), os.path.abspath(filename))
+        future = asyncio.get_running_loop().create_future()
+        request = self.pending.get(key)
+        if request is None:
+            self.pending[key] = [journal, filename, [future]]
+            self._queue.put_nowait(key)
+        else:
+            request[2].append(future)
+            self.coalesced += 1
+        await future
+
+    async def _run(self):
+        while True:
+            key = await self._queue.get()
+            journal, filename, futures = self.pending.pop(key)
+            start = time.perf_counter()
+            try:
+                # Снимок берем в потоке цикла событий, пока журнал никто не меняет, а текст собираем уже в потоке
+                snapshot = list(journal)
+                await asyncio.to_thread(self._write, filename, journal.format_entries, snapshot)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(None)
+            finally:
+                latency = time.perf_counter() - start
+                self.writes += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+                self._queue.task_done()
+
+    def _write(self, filename, format_entries, snapshot):
+        text = format_entries(snapshot)
+        if not self.atomic:
+            with open(filename, 'w', encoding='utf-8') as file:
+                file.write(text)
+            return
+        directory = os.path.dirname(os.path.abspath(filename))
+        mode = self._file_mode(filename)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.journal-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.write(text)
+                file.flush()
+                os.fchmod(file.fileno(), mode)
+                os.fsync(file.fileno())
+            os.replace(tmp, filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @staticmethod
+    def _file_mode(filename):
+        # Права, которые останутся у файла после os.replace: как у заменяемого файла, а для нового - как у open()
+        try:
+            return stat.S_IMODE(os.stat(filename).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    async def close(self):
+        if self._worker is not None:
+            await self._queue.join()
+            self._worker.cancel()
+            self._worker = None
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def stats(self):
+        return {
+            'queue_depth': len(self.pending),
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'avg_latency': self.total_latency / self.writes if self.writes else 0.0,
+            'max_latency': self.max_latency,
+        }
+
+
+if __name__ == '__main__':
+    from lesson import Journal
+
+    async def main():
+        directory = tempfile.mkdtemp()
+        journals = [Journal() for _ in range(3)]
+        async with AsyncPersistenceManager() as pm:
+            saves = []
+            for n, j in enumerate(journals):
+                for i in range(5):
+                    j.add_entry(f'journal {n}, entry {i}')
+                    # Несколько сохранений подряд одного журнала сольются в одну запись
+                    saves.append(pm.save_to_file(j, os.path.join(directory, f'journal{n}.txt')))
+            await asyncio.gather(*saves)
+            print(pm.stats())
+        print('mode:', oct(stat.S_IMODE(os.stat(os.path.join(directory, 'journal0.txt')).st_mode)))
+        with open(os.path.join(directory, 'journal0.txt'), encoding='utf-8') as fh:
+            print(fh.read())
+
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+# Расширение SRP: сжатые архивы журналов.
+# Записи журнала - в основном повторяющийся текст, а PersistenceManager пишет его как есть.
+# Идея:
+#   - журнал пишется потоково блоками по N записей, каждый блок сжимается отдельно кодеком из стандартной
+#     библиотеки (zlib, bz2, lzma; zstd - если он есть в этой сборке Python);
+#   - у каждого блока свой заголовок (длина, число записей, id первой записи), поэтому блоки можно
+#     пропускать, не распаковывая, и распаковывать по отдельности для частичного чтения;
+#   - внутри блока тот же текстовый формат, что и в data/journal.txt: 'id: текст' на строку.
+import bz2
+import lzma
+import struct
+import zlib
+
+try:
+    from compression import zstd    # Python 3.14+
+except ImportError:
+    zstd = None
+
+MAGIC = b'JRNLZIP1'
+FILE_HEADER = struct.Struct('<8s8s')    # magic, имя кодека
+BLOCK_HEADER = struct.Struct('<IIQ')    # длина сжатых данных, число записей, id первой записи
+
+CODECS = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'bz2': (bz2.compress, bz2.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+if zstd is not None:
+    CODECS['zstd'] = (zstd.compress, zstd.decompress)
+
+
+class CompressedPersistenceManager:
+    """Класс сохраняет журнал в сжатый архив из независимых блоков и читает его обратно."""
+    def __init__(self, codec='zlib', block_entries=10_000):
+        if codec not in CODECS:
+            raise ValueError(f'Unknown codec {codec!r}, available: {", ".join(CODECS)}')
+        self.codec = codec
+        self.block_entries = block_entries
+
+    def save_to_file(self, journal, filename):
+        compress = CODECS[self.codec][0]
+        with open(filename, 'wb') as fh:
+            fh.write(FILE_HEADER.pack(MAGIC, self.codec.encode()))
+            block = []
+            first_id = None
+            for entry_id, text in journal:
+                if first_id is None:
+                    first_id = entry_id
+                block.append(f'{entry_id}: {text}')
+                if len(block) == self.block_entries:
+                    self._write_block(fh, compress, block, first_id)
+                    block, first_id = [], None
+            if block:
+                self._write_block(fh, compress, block, first_id)
+
+    @staticmethod
+    def _write_block(fh, compress, block, first_id):
+        data = compress('\n'.join(block).encode('utf-8'))
+        fh.write(BLOCK_HEADER.pack(len(data), len(block), first_id))
+        fh.write(data)
+
+    @staticmethod
+    def _open(filename):
+        fh = open(filename, 'rb')
+        magic, codec = FILE_HEADER.unpack(fh.read(FILE_HEADER.size))
+        if magic != MAGIC:
+            fh.close()
+            raise ValueError(f'{filename} is not a compressed journal')
+        return fh, CODECS[codec.rstrip(b'\0').decode()][1]
+
+    @staticmethod
+    def _headers(fh):
+        while True:
+            raw = fh.read(BLOCK_HEADER.size)
+            if not raw:
+                return
+            length, count, first_id = BLOCK_HEADER.unpack(raw)
+            yield fh.tell(), length, count, first_id
+
+    @classmethod
+    def blocks(cls, filename):
+        """Оглавление архива: (смещение, длина, число записей, id первой записи) без распаковки."""
+        fh, _ = cls._open(filename)
+        with fh:
+            result = []
+            for header in cls._headers(fh):
+                result.append(header)
+                fh.seek(header[1], 1)
+            return result
+
+    @classmethod
+    def load_block(cls, filename, offset, length):
+        """Распаковывает один блок по данным из blocks()."""
+        fh, decompress = cls._open(filename)
+        with fh:
+            fh.seek(offset)
+            return decompress(fh.read(length)).decode('utf-8').split('\n')
+
+    @classmethod
+    def load(cls, filename):
+        """Лениво отдает записи архива, распаковывая по одному блоку за раз."""
+        fh, decompress = cls._open(filename)
+        with fh:
+            for offset, length, count, first_id in cls._headers(fh):
+                yield from decompress(fh.read(length)).decode('utf-8').split('\n')
+
+
+def compression_benchmark(sizes=(10_000, 100_000, 1_000_000)):
+    """Сравнивает скорость и размер на диске с обычным текстовым PersistenceManager."""
+    import os
+    import tempfile
+    import time
+    from lesson import Journal, PersistenceManager
+
+    directory = tempfile.mkdtemp()
+    for size in sizes:
+        j = Journal()
+        for i in range(size):
+            j.add_entry(f'I worked today so much, task #{i % 1000} is done')
+        print(f'{size} entries:')
+
+        plain = os.path.join(directory, 'journal.txt')
+        start = time.perf_counter()
+        PersistenceManager.save_to_file(j, plain)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(plain) as fh:
+            for _ in fh:
+                pass
+        loaded = time.perf_counter() - start
+        print(f'  plain: {os.path.getsize(plain):>12} bytes, save {saved:.3f}s, load {loaded:.3f}s')
+
+        for codec in CODECS:
+            archive = os.path.join(directory, f'journal.{codec}')
+            pm = CompressedPersistenceManager(codec)
+            start = time.perf_counter()
+            pm.save_to_file(j, archive)
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in pm.load(archive):
+                pass
+            loaded = time.perf_counter() - start
+            print(f'  {codec:>5}: {os.path.getsize(archive):>12} bytes, save {saved:.3f}s, load {loaded:.3f}s')
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Например: python compressed_journal.py 10000 100000 1000000 10000000
+    compression_benchmark(tuple(int(n) for n in sys.argv[1:]) or (10_000, 100_000))
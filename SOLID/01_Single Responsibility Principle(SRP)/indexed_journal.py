@@ -0,0 +1,126 @@
+# Расширение SRP: бинарный формат журнала с индексом для произвольного доступа.
+# Чтобы прочитать одну запись из файла PersistenceManager, приходится читать и разбирать весь файл.
+# Идея:
+#   - файл = заголовок + тексты записей подряд + индекс из записей фиксированной длины (id, смещение, длина);
+#   - файл открывается через mmap, поэтому "открытие" многогигабайтного журнала ничего не читает,
+#     а любая запись достается по позиции за O(1) и по id бинарным поиском, срезом без копирования (memoryview);
+#   - конвертер переводит обычный data/journal.txt в новый формат построчно.
+import mmap
+import struct
+
+from append_only import AppendOnlyPersistenceManager
+
+MAGIC = b'JRNLIDX1'
+HEADER = struct.Struct('<8sQQ')     # magic, количество записей, смещение индекса
+INDEX_ENTRY = struct.Struct('<QQI')  # id, смещение текста, длина текста в байтах
+
+
+def write_indexed_journal(entries, filename):
+    """Записывает пары (id, текст) в бинарный формат. id должны возрастать (как в Journal)."""
+    index = bytearray()
+    count = 0
+    last_id = -1
+    with open(filename, 'wb') as fh:
+        fh.write(HEADER.pack(MAGIC, 0, 0))
+        offset = HEADER.size
+        for entry_id, text in entries:
+            if entry_id <= last_id:
+                raise ValueError(f'Entry ids must be increasing, got {entry_id} after {last_id}')
+            last_id = entry_id
+            data = text.encode('utf-8')
+            fh.write(data)
+            index += INDEX_ENTRY.pack(entry_id, offset, len(data))
+            offset += len(data)
+            count += 1
+        fh.write(index)
+        fh.seek(0)
+        fh.write(HEADER.pack(MAGIC, count, offset))
+
+
+def convert_text_journal(source, destination):
+    """Переводит текстовый журнал ('id: текст' на строку) в бинарный формат."""
+    def entries():
+        for line in AppendOnlyPersistenceManager.load(source):
+            if line:
+                entry_id, text = line.split(': ', 1)
+                yield int(entry_id), text
+    write_indexed_journal(entries(), destination)
+
+
+class MappedJournal:
+    """Журнал только для чтения поверх mmap бинарного файла."""
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{filename} is not an indexed journal')
+
+    def _index_entry(self, pos):
+        if not 0 <= pos < self.count:
+            raise IndexError(pos)
+        return INDEX_ENTRY.unpack_from(self._map, self.index_offset + pos * INDEX_ENTRY.size)
+
+    def raw_at(self, pos):
+        """(id, memoryview) - срез без копирования. Его нужно освободить до close()."""
+        entry_id, offset, length = self._index_entry(pos)
+        return entry_id, memoryview(self._map)[offset:offset + length]
+
+    def text_at(self, pos):
+        entry_id, offset, length = self._index_entry(pos)
+        return self._map[offset:offset + length].decode('utf-8')
+
+    def position_of(self, entry_id):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._index_entry(mid)[0] < entry_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count or self._index_entry(lo)[0] != entry_id:
+            raise KeyError(entry_id)
+        return lo
+
+    def get_entry(self, entry_id):
+        return self.text_at(self.position_of(entry_id))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for pos in range(self.count):
+            yield self._index_entry(pos)[0], self.text_at(pos)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    from lesson import Journal
+
+    j = Journal()
+    for i in range(100_000):
+        j.add_entry(f'entry number {i}')
+    j.remove_entry(5)
+
+    file = os.path.join(tempfile.mkdtemp(), 'journal.idx')
+    write_indexed_journal(j, file)
+    with MappedJournal(file) as mj:
+        print(f'{len(mj)} entries, #6 -> {mj.get_entry(6)!r}, last -> {mj.text_at(len(mj) - 1)!r}')
+
+    converted = os.path.join(tempfile.mkdtemp(), 'journal.idx')
+    convert_text_journal(r'../data/journal.txt', converted)
+    with MappedJournal(converted) as mj:
+        for entry_id, text in mj:
+            print(f'{entry_id}: {text}')
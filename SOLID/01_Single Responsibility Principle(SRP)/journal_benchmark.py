@@ -0,0 +1,32 @@
+# Замер стоимости удаления записей из журнала при росте его размера.
+# При хранении в списке del self.entries[pos] сдвигает все последующие элементы (O(n)),
+# при хранении по стабильным id удаление стоит O(1) и не зависит от размера журнала.
+import random
+import time
+
+from lesson import Journal
+
+
+def remove_cost(size, removals=10_000):
+    j = Journal()
+    for i in range(size):
+        j.add_entry(f'entry {i}')
+    victims = random.sample(range(1, size + 1), removals)
+    start = time.perf_counter()
+    for entry_id in victims:
+        j.remove_entry(entry_id)
+    return (time.perf_counter() - start) / removals
+
+
+def list_remove_cost(size, removals=10_000):
+    entries = [f'{i}: entry {i}' for i in range(size)]
+    start = time.perf_counter()
+    for _ in range(removals):
+        del entries[random.randrange(len(entries))]
+    return (time.perf_counter() - start) / removals
+
+
+if __name__ == '__main__':
+    for size in (10_000, 100_000, 1_000_000):
+        print(f'{size:>9} entries: journal {remove_cost(size) * 1e9:8.0f} ns/remove, '
+              f'list {list_remove_cost(size) * 1e9:8.0f} ns/remove')
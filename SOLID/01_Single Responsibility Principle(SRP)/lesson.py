@@ -6,18 +6,48 @@
 class Journal:
     """Основная обязанность журнала это хранение и удаление записей."""
     def __init__(self):
-        self.entries = []
+        self.entries = {}       # id -> текст. dict сохраняет порядок вставки и удаляет за O(1), а id стабильны
         self.count = 0
+        self.removed = 0        # сколько удалений прошло с последнего уплотнения
+        # Слушатели получают (id, текст) каждой новой записи и (id, None) при удалении записи
+        # (например, для дозаписи в файл, см. append_only.py)
+        self.listeners = []
 
     def add_entry(self, text):
         self.count += 1
-        self.entries.append(f'{self.count}: {text}')
+        self.entries[self.count] = text
+        for listener in self.listeners:
+            listener(self.count, text)
+        return self.count
 
-    def remove_entry(self, pos):
-        del self.entries[pos]
+    def remove_entry(self, entry_id):
+        del self.entries[entry_id]
+        for listener in self.listeners:
+            listener(entry_id, None)
+        # Удаленные ключи остаются в dict "надгробиями", и обход их все равно просматривает.
+        # Когда удалений становится больше, чем живых записей, пересобираем словарь.
+        self.removed += 1
+        if self.removed > len(self.entries):
+            self.entries = dict(self.entries)
+            self.removed = 0
+
+    def get_entry(self, entry_id):
+        return self.entries[entry_id]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.items())
 
     def __str__(self):
-        return '\n'.join(self.entries)
+        # Текст записи форматируется только при выводе
+        return self.format_entries(self.entries.items())
+
+    @staticmethod
+    def format_entries(entries):
+        """Текст журнала по парам (id, запись) - например, по снимку list(journal)."""
+        return '\n'.join(f'{entry_id}: {text}' for entry_id, text in entries)
 
     # Тепрь нарушим SRP возложив на журнал дополнительные ответственности
     # Далее мы добавляем вторичную ответственность сохранять себя в файл, а также загружать себя
@@ -43,9 +73,8 @@ class PersistenceManager:
     """Клас отвечает за сохранение определенного объекта в файл."""
     @staticmethod
     def save_to_file(journal, filename):
-        file = open(filename, 'w')
-        file.write(str(journal))
-        file.close()
+        with open(filename, 'w') as file:
+            file.write(str(journal))
 
 # ВЫВОД:
 #   - НЕ перегружайте свои объекты большим колличеством обязанностей
@@ -0,0 +1,151 @@
+# Расширение OCP: кеш результатов повторяющихся запросов.
+# Каталог меняется редко, а одни и те же комбинации ColorSpecification/SizeSpecification запрашиваются постоянно.
+# Идея:
+#   - ключ кеша - канонический вид дерева спецификаций (large & blue и blue & large делят одну запись);
+#   - каждая запись помнит версию каталога, на которой была посчитана, поэтому устаревшие записи не отдаются;
+#   - при изменении каталога удаляем только затронутые записи: если измененный продукт не удовлетворяет
+#     спецификации, ее результат не поменялся, и запись просто переносится на новую версию;
+#   - LRU-вытеснение, ограничения по размеру и счетчики попаданий/промахов;
+#   - при промахе результат отдается потоком и копится в буфере только до max_result_size: если результат
+#     больше, буфер отбрасывается, а остаток идет без кеширования. Запись сохраняется, только если результат
+#     дочитан до конца и каталог за это время не изменился;
+#   - кеш не держит каталоги: он помнит их через weakref, а слушатель в каталоге ссылается на кеш тоже через
+#     weakref. Когда каталог удаляется, его записи удаляются вместе с ним, а clear() отписывается от каталогов.
+import weakref
+from collections import OrderedDict
+
+from lesson import Filter, BetterFilter
+from spec_compiler import canonical
+
+
+class CachedFilter(Filter):
+    """Фильтр, запоминающий результаты для версионируемых коллекций (например, ProductIndex)."""
+    def __init__(self, inner=None, maxsize=128, max_result_size=100_000):
+        self.inner = inner or BetterFilter()
+        self.maxsize = maxsize                      # максимум записей в кеше
+        self.max_result_size = max_result_size      # результаты больше этого не кешируем
+        self.entries = OrderedDict()                # (id каталога, ключ) -> [версия, спецификация, результат]
+        self.catalogs = {}                          # id каталога -> (weakref на каталог, слушатель в нем)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def filter(self, items, spec):
+        version = getattr(items, 'version', None)
+        if version is None:
+            # Коллекция без версии: мы не узнаем о ее изменениях, поэтому не кешируем
+            yield from self.inner.filter(items, spec)
+            return
+        self._watch(items)
+        key = (id(items), canonical(spec))
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            yield from entry[2]
+            return
+        self.misses += 1
+        results = []
+        for item in self.inner.filter(items, spec):
+            if results is not None:
+                results.append(item)
+                if len(results) > self.max_result_size:
+                    results = None
+            yield item
+        if results is not None and items.version == version:
+            self.entries[key] = [version, spec, tuple(results)]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def _watch(self, catalog):
+        watched = self.catalogs.get(id(catalog))
+        if watched is not None and watched[0]() is catalog:
+            return
+        catalog_id = id(catalog)
+        cache_ref = weakref.ref(self)
+
+        def listener(item):
+            cache = cache_ref()
+            if cache is not None:
+                cache._invalidate(catalog_id, catalog_ref(), item)
+
+        def forget(_):
+            cache = cache_ref()
+            if cache is not None:
+                cache._forget(catalog_id)
+
+        catalog_ref = weakref.ref(catalog, forget)
+        self.catalogs[catalog_id] = (catalog_ref, listener)
+        catalog.listeners.append(listener)
+
+    def _invalidate(self, catalog_id, catalog, item):
+        if catalog is None:
+            return
+        for key, entry in list(self.entries.items()):
+            if key[0] != catalog_id:
+                continue
+            if entry[1].is_satisfied(item):
+                del self.entries[key]
+                self.invalidations += 1
+            elif entry[0] == catalog.version - 1:
+                entry[0] = catalog.version
+
+    def _forget(self, catalog_id):
+        # Каталог удален: его id может достаться новому объекту, поэтому записи по этому id больше не годятся
+        self.catalogs.pop(catalog_id, None)
+        for key in [key for key in self.entries if key[0] == catalog_id]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+        for catalog_ref, listener in self.catalogs.values():
+            catalog = catalog_ref()
+            if catalog is not None:
+                catalog.listeners.remove(listener)
+        self.catalogs.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+if __name__ == '__main__':
+    from lesson import Product, Color, Size, ColorSpecification, SizeSpecification
+    from indexed_filter import ProductIndex, IndexedFilter
+
+    catalog = ProductIndex([
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+        Product('House', Color.BLUE, Size.LARGE),
+    ])
+    large = SizeSpecification(Size.LARGE)
+    blue = ColorSpecification(Color.BLUE)
+    cf = CachedFilter(IndexedFilter())
+
+    print([p.name for p in cf.filter(catalog, large & blue)])
+    print([p.name for p in cf.filter(catalog, blue & large)])   # попадание в кеш
+    catalog.add(Product('Grass', Color.GREEN, Size.SMALL))      # не затрагивает запрос
+    print([p.name for p in cf.filter(catalog, large & blue)])
+    catalog.add(Product('Sky', Color.BLUE, Size.LARGE))         # затрагивает запрос
+    print([p.name for p in cf.filter(catalog, large & blue)])
+    print(cf.stats())
+
+    # Большой результат отдается потоком и не кешируется; кеш не держит удаленный каталог
+    import gc
+    big = ProductIndex(Product(f'p{i}', Color.BLUE, Size.LARGE) for i in range(1_000))
+    small_cache = CachedFilter(IndexedFilter(), max_result_size=100)
+    print(sum(1 for _ in small_cache.filter(big, blue)), small_cache.stats()['entries'])
+    big_ref = weakref.ref(big)
+    del big
+    gc.collect()
+    print('catalog freed:', big_ref() is None, '| watched catalogs:', len(small_cache.catalogs))
@@ -0,0 +1,150 @@
+# Расширение OCP: индексированный фильтр для больших каталогов.
+# BetterFilter проверяет каждую спецификацию для каждого продукта, т.е. на каталоге из миллионов элементов
+# любой запрос - это полный проход на уровне Python.
+# Идея:
+#   - храним инвертированные индексы по атрибутам (color -> ids, size -> ids) и поддерживаем их при вставке/удалении;
+#   - спецификации отвечаем пересечением множеств id, а не проверкой каждого элемента;
+#   - сами классы спецификаций НЕ меняем (OCP!): правила индексирования регистрируются снаружи через singledispatch,
+#     а для спецификаций, которые индексировать нельзя, откатываемся к обычному сканированию.
+from functools import singledispatch
+
+from lesson import Filter, BetterFilter, ColorSpecification, SizeSpecification, AndSpecification, OrSpecification, \
+    NotSpecification
+
+
+class ProductIndex:
+    """Коллекция продуктов с инвертированными индексами по атрибутам."""
+    indexed_attributes = ('color', 'size')
+
+    def __init__(self, items=()):
+        self.items = {}     # id -> продукт (dict сохраняет порядок вставки и удаляет за O(1))
+        self.indexes = {attr: {} for attr in self.indexed_attributes}
+        self._next_id = 0
+        self.version = 0        # растет при каждом изменении коллекции
+        self.listeners = []     # вызываются с измененным продуктом (см. cached_filter.py)
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        item_id = self._next_id
+        self._next_id += 1
+        self.items[item_id] = item
+        for attr, index in self.indexes.items():
+            index.setdefault(getattr(item, attr), set()).add(item_id)
+        self._changed(item)
+        return item_id
+
+    def remove(self, item_id):
+        item = self.items.pop(item_id)
+        for attr, index in self.indexes.items():
+            ids = index[getattr(item, attr)]
+            ids.discard(item_id)
+            if not ids:
+                del index[getattr(item, attr)]
+        self._changed(item)
+        return item
+
+    def _changed(self, item):
+        self.version += 1
+        for listener in self.listeners:
+            listener(item)
+
+    def lookup(self, attr, value):
+        return self.indexes[attr].get(value, frozenset())
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+
+# Правила индексирования. Возвращают (множество id, exact) или None, если спецификацию нельзя ответить по индексу.
+# exact=True означает, что все найденные id гарантированно удовлетворяют спецификации и проверять их не нужно.
+@singledispatch
+def candidates(spec, index):
+    return None
+
+
+@candidates.register
+def _(spec: ColorSpecification, index):
+    return index.lookup('color', spec.color), True
+
+
+@candidates.register
+def _(spec: SizeSpecification, index):
+    return index.lookup('size', spec.size), True
+
+
+@candidates.register
+def _(spec: AndSpecification, index):
+    sets = []
+    exact = True
+    for child in spec.args:
+        found = candidates(child, index)
+        if found is None:
+            exact = False   # этого потомка проверим по-старому, но уже на суженном множестве
+            continue
+        ids, child_exact = found
+        sets.append(ids)
+        exact = exact and child_exact
+    if not sets:
+        return None
+    sets.sort(key=len)  # пересекаем начиная с самого маленького множества
+    return sets[0].intersection(*sets[1:]), exact
+
+
+@candidates.register
+def _(spec: OrSpecification, index):
+    # Объединение возможно, только если каждую ветку можно ответить по индексу
+    found = [candidates(child, index) for child in spec.args]
+    if not found or any(f is None for f in found):
+        return None
+    return set().union(*(ids for ids, _ in found)), all(exact for _, exact in found)
+
+
+@candidates.register
+def _(spec: NotSpecification, index):
+    found = candidates(spec.spec, index)
+    if found is None or not found[1]:
+        return None
+    return index.items.keys() - found[0], True
+
+
+class IndexedFilter(Filter):
+    """Фильтр, который отвечает на запросы по индексам ProductIndex."""
+    def __init__(self):
+        self.fallback = BetterFilter()
+
+    def filter(self, items, spec):
+        found = candidates(spec, items) if isinstance(items, ProductIndex) else None
+        if found is None:
+            yield from self.fallback.filter(items, spec)
+            return
+        ids, exact = found
+        for item_id in sorted(ids):     # id растут монотонно, значит сортировка сохраняет порядок вставки
+            item = items.items[item_id]
+            if exact or spec.is_satisfied(item):
+                yield item
+
+
+if __name__ == '__main__':
+    from lesson import Product, Color, Size
+
+    catalog = ProductIndex([
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+        Product('House', Color.BLUE, Size.LARGE),
+    ])
+    sky_id = catalog.add(Product('Sky', Color.BLUE, Size.LARGE))
+
+    f = IndexedFilter()
+    large_blue = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE)
+    print('Large blue products (indexed):')
+    for p in f.filter(catalog, large_blue):
+        print(f' - {p.name} is large and blue')
+
+    catalog.remove(sky_id)
+    print('Large blue products after removing Sky:')
+    for p in f.filter(catalog, large_blue):
+        print(f' - {p.name} is large and blue')
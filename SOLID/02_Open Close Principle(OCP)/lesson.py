@@ -63,6 +63,12 @@ class Specification:
     def __and__(self, other):
         return AndSpecification(self, other)
 
+    def __or__(self, other):
+        return OrSpecification(self, other)
+
+    def __invert__(self):
+        return NotSpecification(self)
+
 
 class Filter:
     """Базовый класс"""
@@ -99,8 +105,31 @@ class AndSpecification(Specification):
         )
 
 
+class OrSpecification(Specification):
+    """Класс комбинатор: достаточно выполнения одной из спецификаций"""
+    def __init__(self, *args):
+        self.args = args
+
+    def is_satisfied(self, item):
+        return any(spec.is_satisfied(item) for spec in self.args)
+
+
+class NotSpecification(Specification):
+    """Класс комбинатор: отрицание спецификации"""
+    def __init__(self, spec):
+        self.spec = spec
+
+    def is_satisfied(self, item):
+        return not self.spec.is_satisfied(item)
+
+
 class BetterFilter(Filter):
     def filter(self, items, spec):
+        # Коллекция может сама предложить более быстрый способ отбора (см. ProductStore в product_store.py)
+        select = getattr(items, 'select', None)
+        if select is not None:
+            yield from select(spec)
+            return
         for item in items:
             if spec.is_satisfied(item):
                 yield item
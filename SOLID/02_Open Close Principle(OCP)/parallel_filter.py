@@ -0,0 +1,175 @@
+# Расширение OCP: параллельная фильтрация по частям (chunks).
+# BetterFilter - однопоточный генератор, поэтому на многоядерной машине большой каталог обрабатывает одно ядро.
+# Идея:
+#   - делим вход на части и проверяем (picklable) дерево спецификаций в пуле процессов,
+#     а на сборках Python без GIL - в пуле потоков;
+#   - из рабочих процессов возвращаются только номера подошедших элементов, сами объекты отдаем из исходной части;
+#   - размер части подбирается по замеру первой части, а если работы мало - остаемся на последовательном пути,
+#     потому что накладные расходы пула его съедят;
+#   - в пул процессов каждая часть уходит через pickle, и сериализует ее главный процесс. Поэтому на первой
+#     части замеряется и стоимость pickle одного элемента: пул выбирается, только если проверка элемента
+#     в пуле вместе с его передачей дешевле проверки на месте, а размер части считается по обеим стоимостям.
+# Пул процессов окупается только для дорогих спецификаций: для простых ColorSpecification/SizeSpecification
+# передача продукта стоит больше его проверки, и фильтр остается на последовательном пути.
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+from lesson import Filter
+
+
+def _match_chunk(chunk, spec):
+    return [i for i, item in enumerate(chunk) if spec.is_satisfied(item)]
+
+
+def _free_threaded():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+class ParallelFilter(Filter):
+    """Фильтр, который проверяет части входа в пуле процессов или потоков."""
+    sample_size = 1_000             # столько элементов проверяем последовательно для оценки стоимости
+    min_chunk_size = 1_000
+    max_chunk_size = 1_000_000
+    target_task_seconds = 0.05      # желаемая длительность одной задачи в пуле
+    serial_threshold_seconds = 0.2  # если по оценке вся работа быстрее, пул не запускаем
+
+    def __init__(self, workers=None, chunk_size=None, ordered=True, executor='auto'):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size    # None - подобрать автоматически
+        self.ordered = ordered
+        if executor == 'auto':
+            executor = 'thread' if _free_threaded() else 'process'
+        self.executor_kind = executor
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            pool_class = ThreadPoolExecutor if self.executor_kind == 'thread' else ProcessPoolExecutor
+            self._executor = pool_class(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def autotune(self, seconds_per_item, transfer_per_item=0.0):
+        # Задача в пуле - это распаковка части и ее проверка
+        chunk = int(self.target_task_seconds / max(seconds_per_item + transfer_per_item, 1e-9))
+        return max(self.min_chunk_size, min(self.max_chunk_size, chunk))
+
+    def transfer_cost(self, sample):
+        """Секунд на передачу одного элемента в рабочий процесс (pickle и обратный разбор); для потоков - 0."""
+        if self.executor_kind == 'thread' or not sample:
+            return 0.0
+        start = time.perf_counter()
+        pickle.loads(pickle.dumps(sample, pickle.HIGHEST_PROTOCOL))
+        return (time.perf_counter() - start) / len(sample)
+
+    def worth_parallel(self, per_item, transfer, remaining):
+        # Главный процесс сериализует все части сам, поэтому передача не делится на число рабочих
+        if self.workers == 1 or per_item / self.workers + transfer >= per_item:
+            return False
+        return remaining is None or remaining * per_item >= self.serial_threshold_seconds
+
+    def filter(self, items, spec):
+        total = len(items) if hasattr(items, '__len__') else None
+        it = iter(items)
+
+        # Первую часть проверяем сами: это и результат, и замер стоимости одного элемента
+        sample = list(islice(it, self.sample_size))
+        start = time.perf_counter()
+        matched = _match_chunk(sample, spec)
+        per_item = (time.perf_counter() - start) / max(len(sample), 1)
+        for i in matched:
+            yield sample[i]
+        if len(sample) < self.sample_size:
+            return
+
+        remaining = total - len(sample) if total is not None else None
+        transfer = self.transfer_cost(sample)
+        if not self.worth_parallel(per_item, transfer, remaining):
+            for item in it:
+                if spec.is_satisfied(item):
+                    yield item
+            return
+
+        chunk_size = self.chunk_size or self.autotune(per_item, transfer)
+        yield from self._parallel(it, spec, chunk_size)
+
+    def _parallel(self, it, spec, chunk_size):
+        pool = self._pool()
+        max_pending = self.workers * 2  # ограничиваем число частей в полете, чтобы не читать весь вход в память
+        pending = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                chunk = list(islice(it, chunk_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append((chunk, pool.submit(_match_chunk, chunk, spec)))
+            if not pending:
+                return
+            if self.ordered:
+                ready = [pending.popleft()]
+            else:
+                wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                ready = [entry for entry in pending if entry[1].done()]
+                for entry in ready:
+                    pending.remove(entry)
+            for chunk, future in ready:
+                for i in future.result():
+                    yield chunk[i]
+
+
+if __name__ == '__main__':
+    import random
+    import hashlib
+    from lesson import Product, Color, Size, BetterFilter, Specification, ColorSpecification, SizeSpecification
+
+    class SlowNameSpecification(Specification):
+        # Дорогая проверка: для нее передача продукта в процесс дешевле самой проверки
+        def is_satisfied(self, item):
+            digest = item.name.encode()
+            for _ in range(50):
+                digest = hashlib.sha256(digest).digest()
+            return digest[0] < 16
+
+    products = [Product(f'p{i}', random.choice(list(Color)), random.choice(list(Size))) for i in range(1_000_000)]
+    large_blue = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE)
+
+    start = time.perf_counter()
+    serial = list(BetterFilter().filter(products, large_blue))
+    print(f'serial: {len(serial)} in {time.perf_counter() - start:.3f}s')
+
+    with ParallelFilter() as pf:
+        start = time.perf_counter()
+        parallel = list(pf.filter(products, large_blue))
+        print(f'parallel ({pf.workers} workers): {len(parallel)} in {time.perf_counter() - start:.3f}s, '
+              f'pool used: {pf._executor is not None}')
+    assert [p.name for p in parallel] == [p.name for p in serial]
+
+    slow = SlowNameSpecification()
+    subset = products[:50_000]
+    start = time.perf_counter()
+    serial = list(BetterFilter().filter(subset, slow))
+    print(f'slow spec, serial: {len(serial)} in {time.perf_counter() - start:.3f}s')
+    with ParallelFilter() as pf:
+        start = time.perf_counter()
+        parallel = list(pf.filter(subset, slow))
+        print(f'slow spec, parallel ({pf.workers} workers): {len(parallel)} in {time.perf_counter() - start:.3f}s, '
+              f'pool used: {pf._executor is not None}')
+    assert [p.name for p in parallel] == [p.name for p in serial]
@@ -0,0 +1,150 @@
+# Расширение OCP: колоночное хранилище продуктов.
+# Каждый Product - это объект со своим __dict__ и ссылками на enum-ы, т.е. сотни байт на элемент,
+# а фильтрация превращается в прыжки по указателям.
+# Идея:
+#   - храним столбцы компактно: цвет и размер - по байту на строку (коды enum .value), имена - в общем буфере;
+#   - спецификации компилируем в маски (bytes из 0/1) сразу по всему столбцу. Операции bytes.translate
+#     и побитовые операции над int выполняются на уровне C, поэтому это "векторизация" без NumPy;
+#   - BetterFilter принимает такое хранилище (через метод select) и отдает легкие представления строк.
+from array import array
+from functools import singledispatch
+
+from lesson import Color, Size, ColorSpecification, SizeSpecification, AndSpecification, OrSpecification, \
+    NotSpecification
+
+
+class ProductRow:
+    """Легкое представление строки хранилища, совместимое с Product по атрибутам."""
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    @property
+    def name(self):
+        return self.store.name_at(self.row)
+
+    @property
+    def color(self):
+        return Color(self.store.colors[self.row])
+
+    @property
+    def size(self):
+        return Size(self.store.sizes[self.row])
+
+
+class ProductStore:
+    """Колоночное хранилище продуктов."""
+    def __init__(self, products=()):
+        self.names = bytearray()        # имена в utf-8 подряд
+        self.name_offsets = array('Q', [0])
+        self.colors = bytearray()
+        self.sizes = bytearray()
+        for p in products:
+            self.append(p.name, p.color, p.size)
+
+    def append(self, name, color, size):
+        self.names += name.encode()
+        self.name_offsets.append(len(self.names))
+        self.colors.append(color.value)
+        self.sizes.append(size.value)
+
+    def name_at(self, row):
+        return self.names[self.name_offsets[row]:self.name_offsets[row + 1]].decode()
+
+    def __len__(self):
+        return len(self.colors)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ProductRow(self, row)
+
+    def select(self, spec):
+        m = mask(spec, self)
+        row = m.find(1)
+        while row != -1:
+            yield ProductRow(self, row)
+            row = m.find(1, row + 1)
+
+
+_INVERT = bytes([1, 0]) + bytes(254)     # таблица для bytes.translate: 0 -> 1, 1 -> 0
+
+
+def _equals_mask(column, code):
+    table = bytearray(256)
+    table[code] = 1
+    return bytes(column.translate(table))
+
+
+def _and_masks(a, b):
+    n = len(a)
+    return (int.from_bytes(a, 'little') & int.from_bytes(b, 'little')).to_bytes(n, 'little')
+
+
+def _or_masks(a, b):
+    n = len(a)
+    return (int.from_bytes(a, 'little') | int.from_bytes(b, 'little')).to_bytes(n, 'little')
+
+
+# Компиляция спецификаций в маски. Для неизвестных спецификаций проверяем строку за строкой.
+@singledispatch
+def mask(spec, store):
+    return bytes(1 if spec.is_satisfied(row) else 0 for row in store)
+
+
+@mask.register
+def _(spec: ColorSpecification, store):
+    return _equals_mask(store.colors, spec.color.value)
+
+
+@mask.register
+def _(spec: SizeSpecification, store):
+    return _equals_mask(store.sizes, spec.size.value)
+
+
+@mask.register
+def _(spec: AndSpecification, store):
+    result = b'\x01' * len(store)
+    for child in spec.args:
+        result = _and_masks(result, mask(child, store))
+    return result
+
+
+@mask.register
+def _(spec: OrSpecification, store):
+    result = bytes(len(store))
+    for child in spec.args:
+        result = _or_masks(result, mask(child, store))
+    return result
+
+
+@mask.register
+def _(spec: NotSpecification, store):
+    return mask(spec.spec, store).translate(_INVERT)
+
+
+if __name__ == '__main__':
+    import random
+    import time
+    from lesson import Product, BetterFilter
+
+    store = ProductStore([
+        Product('Apple', Color.GREEN, Size.SMALL),
+        Product('Tree', Color.GREEN, Size.LARGE),
+        Product('House', Color.BLUE, Size.LARGE),
+    ])
+    bf = BetterFilter()
+    large_blue = SizeSpecification(Size.LARGE) & ColorSpecification(Color.BLUE)
+    print('Large blue products (columnar):')
+    for p in bf.filter(store, large_blue):
+        print(f' - {p.name} is large and blue')
+
+    # Сравним с обычным списком объектов
+    n = 500_000
+    products = [Product(f'p{i}', random.choice(list(Color)), random.choice(list(Size))) for i in range(n)]
+    store = ProductStore(products)
+    for name, items in (('objects', products), ('columnar', store)):
+        start = time.perf_counter()
+        found = sum(1 for _ in bf.filter(items, large_blue))
+        print(f'{name}: {found} of {n} in {time.perf_counter() - start:.3f}s')
@@ -0,0 +1,287 @@
+# Расширение OCP: компилятор спецификаций.
+# AndSpecification проверяет потомков в порядке объявления, а на каждый элемент создает map/lambda.
+# Идея:
+#   - превращаем дерево спецификаций в плоское дерево узлов: вложенные AND/OR сливаются, повторы удаляются,
+#     двойное отрицание сокращается;
+#   - по дереву узлов генерируется одна функция-предикат с выражением на and/or/not, в котором проверки цвета
+#     и размера подставлены сравнениями атрибутов, а остальные спецификации - вызовами их is_satisfied.
+#     В ней нет ни счетчиков, ни генераторов, поэтому проверка стоит как написанное вручную выражение;
+#   - статистика собирается выборочно: первые sample_size вызовов (и sample_size вызовов после resample())
+#     идут через узлы, которые считают вызовы, попадания и время. После выборки потомки переупорядочиваются
+#     так, чтобы дешевые и наиболее "отсекающие" проверки шли первыми, и предикат генерируется заново;
+#   - explain() показывает план и статистику по каждому узлу, когда запрос к каталогу работает медленно.
+from functools import singledispatch
+from time import perf_counter_ns
+
+from lesson import Specification, ColorSpecification, SizeSpecification, AndSpecification, OrSpecification, \
+    NotSpecification
+
+
+# Канонический (хешируемый) вид спецификации: large & blue и blue & large дают один и тот же ключ.
+# Для неизвестных спецификаций ключом служит сам объект.
+@singledispatch
+def canonical(spec):
+    return 'spec', spec
+
+
+@canonical.register
+def _(spec: ColorSpecification):
+    return 'color', spec.color
+
+
+@canonical.register
+def _(spec: SizeSpecification):
+    return 'size', spec.size
+
+
+@canonical.register
+def _(spec: AndSpecification):
+    return 'and', frozenset(canonical(child) for child in _flatten(spec, AndSpecification))
+
+
+@canonical.register
+def _(spec: OrSpecification):
+    return 'or', frozenset(canonical(child) for child in _flatten(spec, OrSpecification))
+
+
+@canonical.register
+def _(spec: NotSpecification):
+    inner = canonical(spec.spec)
+    if inner[0] == 'not':
+        return inner[1]
+    return 'not', inner
+
+
+def _flatten(spec, combinator):
+    """Раскрывает вложенные комбинаторы одного типа: (a & b) & c -> a, b, c."""
+    for child in spec.args:
+        if isinstance(child, combinator):
+            yield from _flatten(child, combinator)
+        else:
+            yield child
+
+
+class _Node:
+    def __init__(self, label):
+        self.label = label
+        self.calls = 0
+        self.hits = 0
+        self.elapsed_ns = 0
+
+    def evaluate(self, item):
+        # Вызывается только во время выборки, поэтому время замеряется на каждом вызове
+        start = perf_counter_ns()
+        result = self._evaluate(item)
+        self.elapsed_ns += perf_counter_ns() - start
+        self.calls += 1
+        if result:
+            self.hits += 1
+        return result
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.calls if self.calls else 0.5
+
+    @property
+    def cost_ns(self):
+        return self.elapsed_ns / self.calls if self.calls else 1.0
+
+    def reorder(self):
+        pass
+
+    def lines(self, depth=0):
+        yield f'{"  " * depth}{self.label}  calls={self.calls} hits={self.hit_rate:.1%} cost={self.cost_ns:.0f}ns'
+
+
+class _Leaf(_Node):
+    def __init__(self, spec, key, label):
+        super().__init__(label)
+        self.spec = spec
+        self.key = key
+
+    def _evaluate(self, item):
+        return self.spec.is_satisfied(item)
+
+    def expression(self, namespace):
+        name = f'v{len(namespace)}'
+        kind, value = self.key
+        if kind in ('color', 'size'):
+            namespace[name] = value
+            return f'item.{kind} == {name}'
+        namespace[name] = self.spec.is_satisfied
+        return f'{name}(item)'
+
+
+class _Not(_Node):
+    def __init__(self, child):
+        super().__init__('NOT')
+        self.child = child
+
+    def _evaluate(self, item):
+        return not self.child.evaluate(item)
+
+    def expression(self, namespace):
+        return f'not ({self.child.expression(namespace)})'
+
+    def reorder(self):
+        self.child.reorder()
+
+    def lines(self, depth=0):
+        yield from super().lines(depth)
+        yield from self.child.lines(depth + 1)
+
+
+class _And(_Node):
+    operator = 'and'
+
+    def __init__(self, children):
+        super().__init__('AND')
+        self.children = children
+
+    def _evaluate(self, item):
+        for child in self.children:
+            if not child.evaluate(item):
+                return False
+        return True
+
+    def expression(self, namespace):
+        return f' {self.operator} '.join(f'({child.expression(namespace)})' for child in self.children)
+
+    def rank(self, child):
+        # Первыми ставим дешевые потомки, которые чаще всего возвращают False
+        return child.cost_ns / max(1.0 - child.hit_rate, 1e-6)
+
+    def reorder(self):
+        for child in self.children:
+            child.reorder()
+        self.children.sort(key=self.rank)
+
+    def lines(self, depth=0):
+        yield from super().lines(depth)
+        for child in self.children:
+            yield from child.lines(depth + 1)
+
+
+class _Or(_And):
+    operator = 'or'
+
+    def __init__(self, children):
+        super().__init__(children)
+        self.label = 'OR'
+
+    def _evaluate(self, item):
+        for child in self.children:
+            if child.evaluate(item):
+                return True
+        return False
+
+    def rank(self, child):
+        # Первыми ставим дешевые потомки, которые чаще всего возвращают True
+        return child.cost_ns / max(child.hit_rate, 1e-6)
+
+
+class CompiledSpecification(Specification):
+    """Скомпилированное дерево спецификаций с адаптивным порядком проверок."""
+    def __init__(self, spec, sample_size=1024):
+        self.source = spec
+        self.sample_size = sample_size
+        self._nodes = {}    # канонический ключ -> узел, одинаковые подспецификации делят один узел
+        self.root = self._compile(spec)
+        self.resample()
+
+    def _compile(self, spec):
+        key = canonical(spec)
+        node = self._nodes.get(key)
+        if node is not None:
+            return node
+        if isinstance(spec, (AndSpecification, OrSpecification)):
+            combinator = type(spec)
+            children, seen = [], set()
+            for child in _flatten(spec, combinator):
+                child_key = canonical(child)
+                if child_key not in seen:
+                    seen.add(child_key)
+                    children.append(self._compile(child))
+            if len(children) == 1:
+                node = children[0]
+            else:
+                node = (_And if combinator is AndSpecification else _Or)(children)
+        elif isinstance(spec, NotSpecification):
+            if isinstance(spec.spec, NotSpecification):
+                node = self._compile(spec.spec.spec)
+            else:
+                node = _Not(self._compile(spec.spec))
+        else:
+            node = _Leaf(spec, key, self._describe(key))
+        self._nodes[key] = node
+        return node
+
+    @staticmethod
+    def _describe(key):
+        kind, value = key
+        if kind == 'spec':
+            return type(value).__name__
+        return f'{kind} == {value}'
+
+    def predicate(self):
+        """Генерирует функцию item -> bool по текущему порядку узлов."""
+        namespace = {}
+        expression = self.root.expression(namespace)
+        exec(f'def predicate(item):\n    return bool({expression})\n', namespace)
+        return namespace['predicate']
+
+    def resample(self):
+        """Следующие sample_size вызовов соберут статистику, после них план перестроится."""
+        self._remaining = self.sample_size
+        # Атрибут экземпляра перекрывает метод класса: вызов spec.is_satisfied(item) сразу попадает в нужную функцию
+        self.is_satisfied = self._sampled if self.sample_size else self.predicate()
+
+    def _sampled(self, item):
+        self._remaining -= 1
+        if not self._remaining:
+            self.root.reorder()
+            self.is_satisfied = self.predicate()
+        return self.root.evaluate(item)
+
+    def is_satisfied(self, item):
+        return self.root.evaluate(item)
+
+    def explain(self):
+        return '\n'.join(self.root.lines())
+
+    def __getstate__(self):
+        # Сгенерированная функция не сериализуется (например, для ParallelFilter) - ее строим заново
+        state = self.__dict__.copy()
+        state['is_satisfied'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.is_satisfied = self.predicate()
+
+
+def compile_spec(spec, sample_size=1024):
+    return CompiledSpecification(spec, sample_size)
+
+
+if __name__ == '__main__':
+    import random
+    import time
+    from lesson import Product, Color, Size, BetterFilter
+
+    products = [Product(f'p{i}', random.choice(list(Color)), random.choice(list(Size))) for i in range(10_000)]
+    large = SizeSpecification(Size.LARGE)
+    blue = ColorSpecification(Color.BLUE)
+    green = ColorSpecification(Color.GREEN)
+
+    spec = compile_spec((large & (blue | green)) & ~~large & ~ColorSpecification(Color.RED))
+    found = sum(1 for _ in BetterFilter().filter(products, spec))
+    print(f'Found {found} products, plan:')
+    print(spec.explain())
+
+    plain = large & blue
+    compiled = compile_spec(large & blue)
+    for name, candidate in (('plain', plain), ('compiled', compiled)):
+        start = time.perf_counter()
+        found = sum(1 for _ in BetterFilter().filter(products * 50, candidate))
+        print(f'{name}: {found} in {time.perf_counter() - start:.3f}s')
@@ -0,0 +1,197 @@
+# Расширение DIP: индекс предков для быстрой проверки "X - предок Y".
+# Обход через traverse() стоит O(числа предков) на каждый запрос, и для дальних предков это весь граф.
+# Хранить готовое транзитивное замыкание тоже нельзя: у родословной с общими предками множество предков
+# человека быстро становится сравнимым с числом всех людей, и память растет квадратично.
+# Идея (разметка интервалами, как в GRAIL):
+#   - обходим граф в глубину от ребенка к родителям; номер человеку дается при выходе из него (post-order).
+#     Предки заканчиваются раньше потомков, поэтому номера идут в топологическом порядке:
+#     если X - предок Y, то номер X меньше номера Y;
+#   - каждому человеку достается интервал [наименьший номер среди его предков, свой номер]. Интервал предка
+#     всегда вложен в интервал потомка, поэтому невложенный интервал сразу отвечает "нет". Обходов два
+#     (второй - в обратном порядке), и интервалы проверяются оба - так отсекается большинство "нет";
+#   - если фильтры не отсекли запрос, идем от потомка вверх по родителям, но только через тех, у кого
+#     номер больше номера X и интервалы вложены, - остальные ветви X заведомо не содержат;
+#   - время запроса не постоянное. Отсеченное "нет" стоит O(1), а "да" (и "нет", которое фильтры пропустили)
+#     стоит обхода тех предков потомка, что прошли фильтры: для дальнего предка это может быть большая часть
+#     его родословной. Точные метки (интервалы дерева) здесь не помогают: у каждого человека два родителя,
+#     и родословная не дерево. Ценой этого индекс занимает линейную память, а не квадратичную;
+#   - память: несколько чисел на человека плюс родители в типизированных массивах (CSR), т.е. линейно.
+# Цикл в данных - это ошибка, о ней сообщаем исключением.
+# Индекс строится через интерфейс RelationshipBrowser (people и find_all_parents_of),
+# поэтому подходит для любого хранилища.
+from array import array
+
+
+class AncestryIndex:
+    """Индекс достижимости "предок - потомок" с интервальной разметкой и номерами в топологическом порядке."""
+    def __init__(self, browser, people=None):
+        if people is None:
+            people = browser.people()
+        self.names = []             # номер -> имя, номера в топологическом порядке (предки раньше потомков)
+        self.ids = {}               # имя -> номер
+        self.low = array('I')       # номер -> наименьший номер среди предков в первом обходе (или свой номер)
+        parents = []
+        for name in people:
+            if name not in self.ids:
+                self._visit(browser, name, parents)
+        # Родители в CSR: родители человека i - parent_ids[parent_offsets[i]:parent_offsets[i + 1]]
+        self.parent_offsets = array('I', [0])
+        self.parent_ids = array('I')
+        for person_parents in parents:
+            self.parent_ids.extend(person_parents)
+            self.parent_offsets.append(len(self.parent_ids))
+        self._second_traversal()
+
+    def _visit(self, browser, name, parents):
+        # Итеративный DFS от человека к родителям; в in_progress - люди на текущем пути обхода
+        in_progress = {name}
+        stack = [(name, iter(browser.find_all_parents_of(name)), [])]
+        while stack:
+            current, pending, seen_parents = stack[-1]
+            for parent in pending:
+                seen_parents.append(parent)
+                if parent in in_progress:
+                    raise ValueError(f'Cycle in relationships: {parent} is an ancestor of itself')
+                if parent not in self.ids:
+                    in_progress.add(parent)
+                    stack.append((parent, iter(browser.find_all_parents_of(parent)), []))
+                    break
+            else:
+                stack.pop()
+                in_progress.discard(current)
+                person_id = self.ids[current] = len(self.names)
+                self.names.append(current)
+                parent_ids = [self.ids[parent] for parent in seen_parents]
+                parents.append(parent_ids)
+                self.low.append(min([self.low[i] for i in parent_ids], default=person_id))
+
+    def _second_traversal(self):
+        # Тот же обход по уже известным родителям, но люди и родители перебираются в обратном порядке
+        count = len(self.names)
+        offsets, parent_ids = self.parent_offsets, self.parent_ids
+        self.rank = rank = array('I', bytes(4 * count))
+        self.low2 = low2 = array('I', bytes(4 * count))
+        visited = bytearray(count)
+        next_rank = 0
+        for start in range(count - 1, -1, -1):
+            if visited[start]:
+                continue
+            visited[start] = 1
+            stack = [(start, iter(reversed(parent_ids[offsets[start]:offsets[start + 1]])))]
+            while stack:
+                current, pending = stack[-1]
+                for parent in pending:
+                    if not visited[parent]:
+                        visited[parent] = 1
+                        stack.append((parent, iter(reversed(parent_ids[offsets[parent]:offsets[parent + 1]]))))
+                        break
+                else:
+                    stack.pop()
+                    rank[current] = next_rank
+                    low = next_rank
+                    for parent in parent_ids[offsets[current]:offsets[current + 1]]:
+                        low = min(low, low2[parent])
+                    low2[current] = low
+                    next_rank += 1
+
+    def _may_be_ancestor(self, ancestor_id, person_id):
+        # Необходимые условия: номер предка меньше, и оба его интервала вложены в интервалы потомка
+        return (ancestor_id < person_id
+                and self.low[person_id] <= self.low[ancestor_id]
+                and self.low2[person_id] <= self.low2[ancestor_id] and self.rank[ancestor_id] <= self.rank[person_id])
+
+    def is_ancestor(self, ancestor, descendant):
+        """O(1) для большинства "нет"; иначе поиск вверх от descendant, ограниченный разметкой."""
+        ancestor_id = self.ids.get(ancestor)
+        descendant_id = self.ids.get(descendant)
+        if ancestor_id is None or descendant_id is None or not self._may_be_ancestor(ancestor_id, descendant_id):
+            return False
+        offsets, parent_ids = self.parent_offsets, self.parent_ids
+        visited = {descendant_id}
+        stack = [descendant_id]
+        while stack:
+            person_id = stack.pop()
+            for parent in parent_ids[offsets[person_id]:offsets[person_id + 1]]:
+                if parent == ancestor_id:
+                    return True
+                if parent not in visited and self._may_be_ancestor(ancestor_id, parent):
+                    visited.add(parent)
+                    stack.append(parent)
+        return False
+
+    def ancestors_of(self, name):
+        offsets, parent_ids = self.parent_offsets, self.parent_ids
+        start = self.ids[name]
+        visited = {start}
+        stack = [start]
+        while stack:
+            person_id = stack.pop()
+            for parent in parent_ids[offsets[person_id]:offsets[person_id + 1]]:
+                if parent not in visited:
+                    visited.add(parent)
+                    stack.append(parent)
+        visited.discard(start)
+        return [self.names[i] for i in sorted(visited)]
+
+    def memory(self):
+        """Байт занимают разметка и родители (без словаря имен)."""
+        arrays = (self.low, self.low2, self.rank, self.parent_offsets, self.parent_ids)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+if __name__ == '__main__':
+    import random
+    import time
+    from lesson import Relationship, Relationships, Person
+    from graph_relationships import GraphRelationships
+
+    family = GraphRelationships()
+    family.bulk_load([
+        ('Adam', 'John'), ('Eve', 'John'), ('Adam', 'Mary'),
+        ('John', 'Chris'), ('John', 'Matt'), ('Mary', 'Ann'), ('Chris', 'Bob'),
+    ])
+    print(f'Adam descendants (bfs): {list(family.find_all_descendants_of("Adam"))}')
+    print(f'Adam descendants (depth 1): {list(family.find_all_descendants_of("Adam", max_depth=1))}')
+    print(f'Bob ancestors (dfs): {[n for n, _ in family.traverse("Bob", Relationship.CHILD, order="dfs")]}')
+    print(f'Chris cousins: {list(family.find_all_cousins_of("Chris"))}')
+    print(f'Path Bob -> Ann: {family.find_relationship_path("Bob", "Ann")}')
+
+    index = AncestryIndex(family)
+    print(f'Eve is ancestor of Bob: {index.is_ancestor("Eve", "Bob")}')
+    print(f'Mary is ancestor of Bob: {index.is_ancestor("Mary", "Bob")}')
+    print(f'Bob ancestors: {sorted(index.ancestors_of("Bob"))}')
+
+    # Индекс строится по любому хранилищу, в том числе по простому Relationships из урока
+    simple = Relationships()
+    simple.add_parent_and_child(Person('John'), Person('Chris'))
+    print(f'Relationships index: {AncestryIndex(simple).ancestors_of("Chris")}')
+
+    # Родословная по поколениям: у каждого, кроме первого поколения, два родителя из предыдущего поколения
+    random.seed(0)
+    for n in (20_000, 80_000, 320_000):
+        generation, pairs = [f'p{i}' for i in range(1_000)], []
+        people = len(generation)
+        while people < n:
+            children = [f'p{people + i}' for i in range(len(generation))]
+            for child in children:
+                mother, father = random.sample(generation, 2)
+                pairs += [(mother, child), (father, child)]
+            generation, people = children, people + len(children)
+        graph = GraphRelationships()
+        graph.bulk_load(pairs)
+        start = time.perf_counter()
+        index = AncestryIndex(graph)
+        built = time.perf_counter() - start
+        names = index.names
+        queries = [(random.choice(names), random.choice(names)) for _ in range(10_000)]
+        elapsed = {True: 0.0, False: 0.0}
+        counts = {True: 0, False: 0}
+        for a, b in queries:
+            start = time.perf_counter()
+            found = index.is_ancestor(a, b)
+            elapsed[found] += time.perf_counter() - start
+            counts[found] += 1
+        # Положительные ответы требуют поиска вверх и стоят заметно дороже отсеченных отрицательных
+        print(f'{len(names)} people: {index.memory() / 1e6:.1f} MB, built in {built:.2f}s, '
+              f'query "yes" {elapsed[True] / max(counts[True], 1) * 1e6:.0f}us ({counts[True]}), '
+              f'"no" {elapsed[False] / max(counts[False], 1) * 1e6:.1f}us ({counts[False]})')
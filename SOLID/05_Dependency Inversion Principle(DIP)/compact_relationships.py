@@ -0,0 +1,118 @@
+# Расширение DIP: компактное хранилище отношений.
+# Relationships хранит каждое ребро дважды, кортежем из двух объектов Person и Relationship. На десятках
+# миллионов ребер это не помещается в память.
+# Идея:
+#   - имена интернируются в целые id (имя хранится один раз, дальше везде только число);
+#   - ребра лежат в типизированных массивах: id источника, код отношения, id цели - 9 байт на ребро;
+#   - обратное ребро (CHILD) не храним, а выводим: "родители X" - это источники ребер PARENT, ведущих в X;
+#   - для запросов за O(степени) лениво строим CSR-индексы (смещения + порядок ребер) сортировкой подсчетом,
+#     индекс сбрасывается при добавлении ребер.
+# Наружу, через интерфейс RelationshipBrowser, по-прежнему отдаются имена.
+import sys
+from array import array
+
+from lesson import Relationship, RelationshipBrowser
+
+
+class CompactRelationships(RelationshipBrowser):
+    """Отношения в типизированных массивах с интернированными именами."""
+
+    def __init__(self):
+        self.names = []             # id -> имя
+        self.ids = {}               # имя -> id
+        self.sources = array('I')
+        self.relations = array('B')
+        self.targets = array('I')
+        self._by_source = None      # CSR-индексы: (смещения, номера ребер)
+        self._by_target = None
+
+    def _intern(self, name):
+        person_id = self.ids.get(name)
+        if person_id is None:
+            name = sys.intern(name)
+            person_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return person_id
+
+    def add_parent_and_child(self, parent, child):
+        self.sources.append(self._intern(parent.name))
+        self.relations.append(Relationship.PARENT.value)
+        self.targets.append(self._intern(child.name))
+        self._by_source = self._by_target = None
+
+    def bulk_load(self, pairs):
+        """Загружает много пар (родитель, ребенок) - объекты Person или просто имена."""
+        intern = self._intern
+        sources, targets = array('I'), array('I')
+        for parent, child in pairs:
+            sources.append(intern(getattr(parent, 'name', parent)))
+            targets.append(intern(getattr(child, 'name', child)))
+        self.sources.extend(sources)
+        self.targets.extend(targets)
+        self.relations.extend(bytes([Relationship.PARENT.value]) * len(sources))
+        self._by_source = self._by_target = None
+
+    def people(self):
+        return list(self.names)
+
+    def _index(self, keys):
+        # Сортировка подсчетом: offsets[id]..offsets[id + 1] - номера ребер с этим ключом в order
+        offsets = array('I', bytes(4 * (len(self.names) + 1)))
+        for key in keys:
+            offsets[key + 1] += 1
+        for i in range(len(self.names)):
+            offsets[i + 1] += offsets[i]
+        fill = array('I', offsets)
+        order = array('I', bytes(4 * len(keys)))
+        for edge, key in enumerate(keys):
+            order[fill[key]] = edge
+            fill[key] += 1
+        return offsets, order
+
+    def _neighbours(self, name, by_source):
+        person_id = self.ids.get(name)
+        if person_id is None:
+            return
+        if by_source:
+            if self._by_source is None:
+                self._by_source = self._index(self.sources)
+            (offsets, order), others = self._by_source, self.targets
+        else:
+            if self._by_target is None:
+                self._by_target = self._index(self.targets)
+            (offsets, order), others = self._by_target, self.sources
+        parent_code = Relationship.PARENT.value
+        for edge in order[offsets[person_id]:offsets[person_id + 1]]:
+            if self.relations[edge] == parent_code:
+                yield self.names[others[edge]]
+
+    def find_all_children_of(self, name):
+        return self._neighbours(name, by_source=True)
+
+    def find_all_parents_of(self, name):
+        return self._neighbours(name, by_source=False)
+
+
+if __name__ == '__main__':
+    import tracemalloc
+    from lesson import Person, Relationships, Research
+
+    relationships = CompactRelationships()
+    relationships.add_parent_and_child(Person('John'), Person('Chris'))
+    relationships.add_parent_and_child(Person('John'), Person('Matt'))
+    Research(relationships)
+    print(f'Matt parents: {list(relationships.find_all_parents_of("Matt"))}')
+
+    # Сравним память на большом числе ребер
+    n = 200_000
+    names = [(f'parent{i // 3}', f'child{i}') for i in range(n)]
+    for browser_class in (Relationships, CompactRelationships):
+        tracemalloc.start()
+        browser = browser_class()
+        for parent, child in names:
+            browser.add_parent_and_child(Person(parent), Person(child))
+        list(browser.find_all_children_of('parent0'))
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{browser_class.__name__}: {current / n:.0f} bytes per edge')
+        del browser
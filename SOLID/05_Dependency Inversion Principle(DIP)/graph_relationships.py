@@ -0,0 +1,70 @@
+# Расширение DIP: хранилище отношений в виде графа со списками смежности.
+# Relationships.find_all_children_of просматривает все кортежи self.relations, т.е. каждый запрос стоит
+# O(общего числа отношений).
+# Идея:
+#   - для каждого типа отношения храним словарь: имя -> список имен на другом конце ребра;
+#   - тогда дети, родители и братья/сестры находятся за O(степени вершины);
+#   - API add_parent_and_child остается прежним, поэтому Research работает без изменений - в этом и смысл DIP:
+#     высокоуровневый модуль зависит от RelationshipBrowser, а не от конкретного хранилища.
+from collections import defaultdict
+
+from lesson import Relationship, RelationshipBrowser
+
+
+class GraphRelationships(RelationshipBrowser):
+    """Отношения в виде списков смежности, сгруппированных по типу отношения."""
+
+    def __init__(self):
+        # adjacency[Relationship.PARENT][a] - те, для кого a родитель; adjacency[Relationship.CHILD][a] - родители a
+        self.adjacency = {
+            Relationship.PARENT: defaultdict(list),
+            Relationship.CHILD: defaultdict(list),
+        }
+
+    def add_parent_and_child(self, parent, child):
+        self.adjacency[Relationship.PARENT][parent.name].append(child.name)
+        self.adjacency[Relationship.CHILD][child.name].append(parent.name)
+
+    def bulk_load(self, pairs):
+        """Загружает много пар (родитель, ребенок) - объекты Person или просто имена."""
+        children = self.adjacency[Relationship.PARENT]
+        parents = self.adjacency[Relationship.CHILD]
+        for parent, child in pairs:
+            parent = getattr(parent, 'name', parent)
+            child = getattr(child, 'name', child)
+            children[parent].append(child)
+            parents[child].append(parent)
+
+    def people(self):
+        return self.adjacency[Relationship.PARENT].keys() | self.adjacency[Relationship.CHILD].keys()
+
+    def _neighbours(self, relationship, name):
+        # .get, а не [], чтобы запрос не создавал пустых записей в defaultdict
+        return iter(self.adjacency[relationship].get(name, ()))
+
+    def find_all_children_of(self, name):
+        return self._neighbours(Relationship.PARENT, name)
+
+    def find_all_parents_of(self, name):
+        return self._neighbours(Relationship.CHILD, name)
+
+
+if __name__ == '__main__':
+    import time
+    from lesson import Person, Relationships, Research
+
+    relationships = GraphRelationships()
+    relationships.add_parent_and_child(Person('John'), Person('Chris'))
+    relationships.add_parent_and_child(Person('John'), Person('Matt'))
+    Research(relationships)
+    print(f'Matt siblings: {list(relationships.find_all_siblings_of("Matt"))}')
+
+    # Сравним скорость запроса на большом числе отношений
+    n = 200_000
+    pairs = [(Person(f'p{i}'), Person(f'c{i}')) for i in range(n)]
+    for browser in (Relationships(), GraphRelationships()):
+        for parent, child in pairs:
+            browser.add_parent_and_child(parent, child)
+        start = time.perf_counter()
+        found = list(browser.find_all_children_of(f'p{n // 2}'))
+        print(f'{type(browser).__name__}: {found} in {time.perf_counter() - start:.6f}s')
@@ -9,6 +9,7 @@
 # Рассмотрим пример:
 #     - предположим что мы проводим гениалогическое исследование, которое будет определять отношение между 2мя людьми
 from abc import abstractmethod
+from collections import deque
 from enum import Enum
 
 
@@ -19,6 +20,8 @@ class Relationship(Enum):
 
 
 class Person:
+    __slots__ = ('name',)   # без __dict__ объект заметно меньше, что важно, когда людей миллионы
+
     def __init__(self, name):
         self.name = name
 
@@ -29,6 +32,89 @@ class RelationshipBrowser:
     def find_all_children_of(self, name):
         pass
 
+    @abstractmethod
+    def find_all_parents_of(self, name):
+        pass
+
+    @abstractmethod
+    def people(self):
+        """Все люди, которые встречаются в отношениях."""
+        pass
+
+    def open_reader(self):
+        """Браузер только для чтения, который вызывающий поток передает в пользование одному другому потоку.
+        Хранилищам в памяти одновременное чтение не мешает, поэтому по умолчанию это сам браузер; хранилище,
+        которое держит соединение (например, с БД), должно открыть для читателя свое соединение."""
+        return self
+
+    def find_all_siblings_of(self, name):
+        """Братья и сестры - это другие дети родителей, поэтому их можно найти через основной интерфейс."""
+        seen = {name}
+        for parent in self.find_all_parents_of(name):
+            for sibling in self.find_all_children_of(parent):
+                if sibling not in seen:
+                    seen.add(sibling)
+                    yield sibling
+
+    # Многошаговые запросы тоже выражаются через основной интерфейс, поэтому работают с любым хранилищем.
+    def traverse(self, name, relationship=Relationship.PARENT, order='bfs', max_depth=None):
+        """Обход в ширину ('bfs') или в глубину ('dfs'): PARENT - вниз к потомкам, CHILD - вверх к предкам.
+        Отдает пары (имя, глубина). Каждый человек отдается один раз, поэтому циклы в данных не зацикливают обход."""
+        step = self.find_all_children_of if relationship == Relationship.PARENT else self.find_all_parents_of
+        visited = {name}
+        frontier = deque([(name, 0)])
+        pop = frontier.popleft if order == 'bfs' else frontier.pop
+        while frontier:
+            current, depth = pop()
+            if current != name:
+                yield current, depth
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for other in step(current):
+                if other not in visited:
+                    visited.add(other)
+                    frontier.append((other, depth + 1))
+
+    def find_all_descendants_of(self, name, max_depth=None):
+        for other, _ in self.traverse(name, Relationship.PARENT, max_depth=max_depth):
+            yield other
+
+    def find_all_ancestors_of(self, name, max_depth=None):
+        for other, _ in self.traverse(name, Relationship.CHILD, max_depth=max_depth):
+            yield other
+
+    def find_all_cousins_of(self, name):
+        """Двоюродные братья и сестры - дети братьев и сестер родителей."""
+        seen = {name}
+        for parent in self.find_all_parents_of(name):
+            for uncle in self.find_all_siblings_of(parent):
+                for cousin in self.find_all_children_of(uncle):
+                    if cousin not in seen:
+                        seen.add(cousin)
+                        yield cousin
+
+    def find_relationship_path(self, first, second):
+        """Кратчайшая цепочка родства от first к second или None.
+        Шаг (Relationship.PARENT, имя) означает, что имя - родитель предыдущего человека в цепочке."""
+        previous = {first: None}
+        frontier = deque([first])
+        while frontier:
+            current = frontier.popleft()
+            if current == second:
+                path = []
+                while previous[current] is not None:
+                    relationship, current_from = previous[current]
+                    path.append((relationship, current))
+                    current = current_from
+                return path[::-1]
+            for relationship, step in ((Relationship.PARENT, self.find_all_parents_of),
+                                       (Relationship.CHILD, self.find_all_children_of)):
+                for other in step(current):
+                    if other not in previous:
+                        previous[other] = (relationship, current)
+                        frontier.append(other)
+        return None
+
 
 # В первую очередь нам необходим какой то низкоуровневый модуль (модуль со всеми деталями реализации,
 # всей семантикой хранения, и всем другим что нужно для хранения отношений между разными людьми)
@@ -49,11 +135,20 @@ class Relationships(RelationshipBrowser):
     # 1
     def find_all_children_of(self, name):
         for r in self.relations:
-            if r[0].name == 'John' and r[1] == Relationship.PARENT:
+            if r[0].name == name and r[1] == Relationship.PARENT:
                 yield r[2].name
         # Это лучше того, что мы сделали раньше, потому что если мы захотим изменить self.relations = [], то у клиента
         # ничего не сломается
 
+    def find_all_parents_of(self, name):
+        for r in self.relations:
+            if r[0].name == name and r[1] == Relationship.CHILD:
+                yield r[2].name
+
+    def people(self):
+        # Каждый человек стоит первым хотя бы в одном отношении
+        return list(dict.fromkeys(r[0].name for r in self.relations))
+
 
 # Очевидно, что это довольно низкоуровневое хранилище
 # Что бы нарушить принцип инверсии зависимостей мы, для начала, определим высокоуровневый модуль.
@@ -72,15 +167,16 @@ class Research:
 # Этот код хороший, с точки зрения работоспособности
 
 
-parent = Person('John')
-child1 = Person('Chris')
-child2 = Person('Matt')
+if __name__ == '__main__':
+    parent = Person('John')
+    child1 = Person('Chris')
+    child2 = Person('Matt')
 
-relationships = Relationships()
-relationships.add_parent_and_child(parent, child1)
-relationships.add_parent_and_child(parent, child2)
+    relationships = Relationships()
+    relationships.add_parent_and_child(parent, child1)
+    relationships.add_parent_and_child(parent, child2)
 
-Research(relationships)
+    Research(relationships)
 
 # Может показаться, что все впорядке, все работает исправно.
 # Но здесь есть большая проблема:
@@ -0,0 +1,100 @@
+# Расширение DIP: пакетный запуск исследований над RelationshipBrowser.
+# Research из урока выполняет один зашитый запрос и печатает результат прямо в конструкторе.
+# Идея:
+#   - движок принимает пачку запросов (имя, тип запроса) и возвращает структурированные результаты
+#     с временем выполнения каждого запроса, ничего не печатая;
+#   - одинаковые запросы выполняются один раз;
+#   - запросы раздаются пулу потоков или пулу процессов. Каждый поток получает своего читателя через
+#     browser.open_reader() (например, свое соединение с БД), а каждый процесс - снимок браузера через pickle
+#     один раз при старте, при любом способе запуска процессов (fork, spawn, forkserver). Во время работы
+#     браузер не должен меняться;
+#   - движок зависит только от интерфейса RelationshipBrowser, как и положено модулю высокого уровня.
+# Сверка результатов на всех хранилищах и во всех режимах запуска - в tests/test_research_engine.py.
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+ResearchResult = namedtuple('ResearchResult', ['name', 'query', 'result', 'latency', 'error'])
+
+QUERIES = {
+    'children': 'find_all_children_of',
+    'parents': 'find_all_parents_of',
+    'siblings': 'find_all_siblings_of',
+    'cousins': 'find_all_cousins_of',
+    'descendants': 'find_all_descendants_of',
+    'ancestors': 'find_all_ancestors_of',
+}
+
+_browser = None     # снимок браузера в рабочем процессе
+_local = threading.local()  # читатель браузера в рабочем потоке
+
+
+def _init_worker(snapshot):
+    global _browser
+    _browser = pickle.loads(snapshot)
+
+
+def _init_thread(readers):
+    _local.browser = readers.get_nowait()
+
+
+def _research(name, query):
+    browser = getattr(_local, 'browser', None) or _browser
+    start = time.perf_counter()
+    try:
+        result = tuple(getattr(browser, QUERIES[query])(name))
+        error = None
+    except Exception as e:
+        result, error = (), repr(e)
+    return ResearchResult(name, query, result, time.perf_counter() - start, error)
+
+
+class ResearchEngine:
+    """Выполняет пачки запросов к RelationshipBrowser в пуле потоков или процессов."""
+    def __init__(self, browser, workers=None, executor='thread', mp_context=None):
+        if executor not in ('thread', 'process'):
+            raise ValueError(f'Unknown executor {executor!r}')
+        self.browser = browser
+        self.workers = workers
+        self.executor = executor
+        self.mp_context = mp_context    # способ запуска процессов, например multiprocessing.get_context('spawn')
+
+    def run(self, queries):
+        """queries - пары (имя, тип запроса из QUERIES). Результаты идут в порядке запросов."""
+        queries = list(queries)
+        for _, query in queries:
+            if query not in QUERIES:
+                raise ValueError(f'Unknown query {query!r}, available: {", ".join(QUERIES)}')
+        unique = list(dict.fromkeys(queries))
+        names, kinds = zip(*unique) if unique else ((), ())
+        if self.executor == 'thread':
+            # Читатели открываются здесь, в вызывающем потоке, по одному на рабочий поток
+            workers = self.workers or min(32, (os.cpu_count() or 1) + 4)
+            readers = queue.SimpleQueue()
+            for _ in range(workers):
+                readers.put(self.browser.open_reader())
+            with ThreadPoolExecutor(workers, initializer=_init_thread, initargs=(readers,)) as pool:
+                results = dict(zip(unique, pool.map(_research, names, kinds)))
+        else:
+            # Снимок делается явно и здесь, чтобы при fork процессы не унаследовали, например, открытое соединение
+            snapshot = pickle.dumps(self.browser)
+            with ProcessPoolExecutor(self.workers, mp_context=self.mp_context, initializer=_init_worker,
+                                     initargs=(snapshot,)) as pool:
+                results = dict(zip(unique, pool.map(_research, names, kinds, chunksize=64)))
+        return [results[q] for q in queries]
+
+
+if __name__ == '__main__':
+    from graph_relationships import GraphRelationships
+
+    family = GraphRelationships()
+    family.bulk_load([('Adam', 'John'), ('Eve', 'John'), ('John', 'Chris'), ('John', 'Matt'), ('Chris', 'Bob')])
+    queries = [('John', 'children'), ('Bob', 'ancestors'), ('Matt', 'siblings'), ('John', 'children')]
+    for executor in ('thread', 'process'):
+        print(f'{executor}:')
+        for r in ResearchEngine(family, workers=2, executor=executor).run(queries):
+            print(f'  {r.name} {r.query}: {r.result} ({r.latency * 1e6:.0f}us)')
@@ -0,0 +1,159 @@
+# Расширение DIP: хранилище отношений на диске (SQLite из стандартной библиотеки).
+# При каждом запуске урока Relationships заново строится в памяти.
+# Идея:
+#   - отношения хранятся в таблице так же, как в Relationships: (человек, отношение, другой человек),
+#     с индексом по (человек, отношение) - запрос детей или родителей идет по индексу;
+#   - add_parent_and_child копит ребра в буфере и вставляет их пачкой в одной транзакции;
+#   - find_all_children_of отдает результат страницами (keyset-пагинация по rowid), поэтому
+#     огромные семьи читаются потоком и не материализуются целиком.
+#   - соединение SQLite нельзя использовать из другого потока и нельзя передать в другой процесс, поэтому
+#     у каждого читателя (open_reader, а в другом процессе - объект после pickle) свое соединение только для чтения.
+#     База в памяти создается именованной и общей (cache=shared), чтобы к ней могли подключиться читатели из
+#     других потоков; в другой процесс ее передать нельзя - для этого нужен файл.
+# Это ровно тот случай из урока, когда "мы решили использовать БД": Research при этом не меняется.
+import itertools
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+from lesson import Relationship, RelationshipBrowser
+
+_memory_databases = itertools.count()
+
+
+class SqliteRelationships(RelationshipBrowser):
+    """Отношения в файле SQLite."""
+
+    def __init__(self, filename=':memory:', batch_size=10_000, page_size=1_000, readonly=False):
+        if filename == ':memory:':
+            filename = f'file:relations-{os.getpid()}-{next(_memory_databases)}?mode=memory&cache=shared'
+        self.filename = filename
+        self.in_memory = filename.startswith('file:') and 'mode=memory' in filename
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.readonly = readonly
+        self.pending = []
+        # Соединение читателя открывается в вызывающем потоке, а используется одним другим потоком
+        if self.in_memory:
+            self.connection = sqlite3.connect(filename, uri=True, check_same_thread=not readonly)
+        elif readonly:
+            self.connection = sqlite3.connect(f'file:{pathname2url(os.path.abspath(filename))}?mode=ro', uri=True,
+                                              check_same_thread=False)
+        else:
+            self.connection = sqlite3.connect(filename)
+        if readonly:
+            return
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS relations (person TEXT NOT NULL, relationship INTEGER NOT NULL, '
+                'other TEXT NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS relations_person ON relations (person, relationship)'
+            )
+
+    def add_parent_and_child(self, parent, child):
+        self.pending.append((parent.name, Relationship.PARENT.value, child.name))
+        self.pending.append((child.name, Relationship.CHILD.value, parent.name))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def bulk_load(self, pairs):
+        """Загружает много пар (родитель, ребенок) - объекты Person или просто имена."""
+        for parent, child in pairs:
+            parent = getattr(parent, 'name', parent)
+            child = getattr(child, 'name', child)
+            self.pending.append((parent, Relationship.PARENT.value, child))
+            self.pending.append((child, Relationship.CHILD.value, parent))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+        self.flush()
+
+    def flush(self):
+        if self.pending:
+            with self.connection:
+                self.connection.executemany('INSERT INTO relations VALUES (?, ?, ?)', self.pending)
+            self.pending.clear()
+
+    def _find(self, name, relationship):
+        self.flush()
+        last_rowid = -1
+        while True:
+            page = self.connection.execute(
+                'SELECT rowid, other FROM relations WHERE person = ? AND relationship = ? AND rowid > ? '
+                'ORDER BY rowid LIMIT ?',
+                (name, relationship.value, last_rowid, self.page_size),
+            ).fetchall()
+            for last_rowid, other in page:
+                yield other
+            if len(page) < self.page_size:
+                return
+
+    def find_all_children_of(self, name):
+        return self._find(name, Relationship.PARENT)
+
+    def find_all_parents_of(self, name):
+        return self._find(name, Relationship.CHILD)
+
+    def people(self):
+        self.flush()
+        return [row[0] for row in self.connection.execute('SELECT DISTINCT person FROM relations')]
+
+    def open_reader(self):
+        self.flush()
+        return SqliteRelationships(self.filename, page_size=self.page_size, readonly=True)
+
+    # В другой процесс передается не соединение, а имя файла: там открывается свое соединение для чтения
+    def __getstate__(self):
+        if self.in_memory:
+            raise TypeError('In-memory SQLite relationships cannot be sent to another process, use a database file')
+        self.flush()
+        return {'filename': self.filename, 'page_size': self.page_size}
+
+    def __setstate__(self, state):
+        self.__init__(state['filename'], page_size=state['page_size'], readonly=True)
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+def benchmark(n=200_000, queries=1_000):
+    """Сравнивает массовую загрузку и задержку запроса с Relationships в памяти."""
+    import os
+    import random
+    import tempfile
+    import time
+    from lesson import Person, Relationships
+
+    people = [(Person(f'parent{i // 4}'), Person(f'child{i}')) for i in range(n)]
+    names = [f'parent{random.randrange(n // 4)}' for _ in range(queries)]
+    browsers = (
+        ('in-memory list', Relationships()),
+        ('sqlite', SqliteRelationships(os.path.join(tempfile.mkdtemp(), 'relations.db'))),
+    )
+    for title, browser in browsers:
+        start = time.perf_counter()
+        for parent, child in people:
+            browser.add_parent_and_child(parent, child)
+        if hasattr(browser, 'flush'):
+            browser.flush()
+        loaded = time.perf_counter() - start
+        # Relationships сканирует весь список на каждый запрос, поэтому ему даем меньше запросов
+        sample = names if hasattr(browser, 'flush') else names[:10]
+        start = time.perf_counter()
+        for name in sample:
+            list(browser.find_all_children_of(name))
+        latency = (time.perf_counter() - start) / len(sample)
+        print(f'{title}: load {loaded:.3f}s, query {latency * 1e6:.0f}us')
+
+
+if __name__ == '__main__':
+    from lesson import Person, Research
+
+    relationships = SqliteRelationships()
+    relationships.add_parent_and_child(Person('John'), Person('Chris'))
+    relationships.add_parent_and_child(Person('John'), Person('Matt'))
+    Research(relationships)
+
+    benchmark()
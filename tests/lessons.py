@@ -0,0 +1,43 @@
+# Примеры лежат в каталогах уроков и импортируют соседей по имени (from lesson import ...), причем модуль
+# lesson.py есть почти в каждом уроке. Поэтому тесты урока работают с его каталогом в начале sys.path,
+# а модули других уроков на это время убираются из sys.modules. Загруженные модули урока запоминаются и
+# возвращаются на место, чтобы импорты внутри функций получали те же классы, что и тест.
+import importlib
+import os
+import sys
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS = os.path.join(ROOT, 'tests')
+
+_loaded = {}    # каталог урока -> {имя модуля: модуль}
+
+
+def _lesson_directory_of(module):
+    filename = getattr(module, '__file__', None)
+    if not filename or not filename.startswith(ROOT + os.sep) or filename.startswith(TESTS + os.sep):
+        return None
+    return os.path.dirname(filename)
+
+
+@contextmanager
+def lesson_directory(directory):
+    """Делает каталог урока (путь относительно корня репозитория) текущим для импортов по имени."""
+    path = os.path.join(ROOT, directory)
+    for name, module in list(sys.modules.items()):
+        module_directory = _lesson_directory_of(module)
+        if module_directory is not None and module_directory != path:
+            del sys.modules[name]
+    sys.modules.update(_loaded.get(path, {}))
+    sys.path.insert(0, path)
+    try:
+        yield
+    finally:
+        sys.path.remove(path)
+        _loaded[path] = {name: module for name, module in sys.modules.items()
+                         if _lesson_directory_of(module) == path}
+
+
+def import_lesson_module(directory, name):
+    with lesson_directory(directory):
+        return importlib.import_module(name)
@@ -0,0 +1,71 @@
+# AncestryIndex сверяется с полным обходом предков через RelationshipBrowser на случайных родословных.
+import random
+
+import pytest
+
+from lessons import import_lesson_module
+
+DIRECTORY = 'SOLID/05_Dependency Inversion Principle(DIP)'
+ancestry = import_lesson_module(DIRECTORY, 'ancestry')
+graph_relationships = import_lesson_module(DIRECTORY, 'graph_relationships')
+lesson = import_lesson_module(DIRECTORY, 'lesson')
+
+
+def random_family(seed, generations=6, width=30, founders=20):
+    # Поколения, у каждого ребенка два родителя из любых предыдущих поколений (родословная - не дерево)
+    rng = random.Random(seed)
+    people = [f'f{i}' for i in range(founders)]
+    pairs = []
+    for g in range(generations):
+        children = [f'g{g}_{i}' for i in range(width)]
+        for child in children:
+            for parent in rng.sample(people, 2):
+                pairs.append((parent, child))
+        people += children
+    family = graph_relationships.GraphRelationships()
+    family.bulk_load(pairs)
+    return family
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_full_traversal(seed):
+    family = random_family(seed)
+    index = ancestry.AncestryIndex(family)
+    names = list(family.people())
+    for descendant in names:
+        expected = set(family.find_all_ancestors_of(descendant))
+        assert set(index.ancestors_of(descendant)) == expected
+        for candidate in names:
+            assert index.is_ancestor(candidate, descendant) == (candidate in expected), (candidate, descendant)
+
+
+def test_ids_are_topological():
+    family = random_family(0)
+    index = ancestry.AncestryIndex(family)
+    for name in index.names:
+        for parent in family.find_all_parents_of(name):
+            assert index.ids[parent] < index.ids[name]
+
+
+def test_unknown_people_are_not_ancestors():
+    index = ancestry.AncestryIndex(random_family(0))
+    assert not index.is_ancestor('nobody', 'g0_0')
+    assert not index.is_ancestor('f0', 'nobody')
+    assert not index.is_ancestor('g0_0', 'g0_0')
+
+
+def test_cycle_is_an_error():
+    family = graph_relationships.GraphRelationships()
+    family.bulk_load([('A', 'B'), ('B', 'C'), ('C', 'A')])
+    with pytest.raises(ValueError):
+        ancestry.AncestryIndex(family)
+
+
+def test_works_with_lesson_relationships():
+    relationships = lesson.Relationships()
+    relationships.add_parent_and_child(lesson.Person('John'), lesson.Person('Chris'))
+    relationships.add_parent_and_child(lesson.Person('Chris'), lesson.Person('Bob'))
+    index = ancestry.AncestryIndex(relationships)
+    assert index.ancestors_of('Bob') == ['John', 'Chris']
+    assert index.is_ancestor('John', 'Bob')
+    assert not index.is_ancestor('Bob', 'John')
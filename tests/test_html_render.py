@@ -0,0 +1,139 @@
+# Печать HtmlElement через шаблоны и кеш фрагментов должна совпадать с исходной рекурсивной печатью
+# (render_recursive) при любых изменениях дерева.
+import io
+import random
+
+import pytest
+
+from lessons import import_lesson_module
+
+simple_builder = import_lesson_module('Builder', 'simple_builder')
+html_render_benchmark = import_lesson_module('Builder', 'html_render_benchmark')
+
+HtmlElement = simple_builder.HtmlElement
+HtmlBuilder = simple_builder.HtmlBuilder
+render_recursive = html_render_benchmark.render_recursive
+
+
+@pytest.fixture(autouse=True)
+def cache_settings():
+    cache = HtmlElement.cache
+    saved = cache.enabled, HtmlElement.escape_text
+    yield cache
+    cache.enabled, HtmlElement.escape_text = saved
+
+
+def random_tree(rng, size):
+    root = HtmlElement('html')
+    nodes = [root]
+    for _ in range(size):
+        element = HtmlElement(rng.choice('abc'), rng.choice(['', 'text']))
+        rng.choice(nodes).append(element)
+        nodes.append(element)
+    return root, nodes
+
+
+def expected(element, indent=0):
+    # render_recursive не экранирует текст, поэтому сравниваем без экранирования
+    return render_recursive(element, indent)
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_recursive_render_under_mutations(enabled, seed):
+    HtmlElement.cache.enabled = enabled
+    HtmlElement.escape_text = False
+    rng = random.Random(seed)
+    root, nodes = random_tree(rng, 500)
+    for _ in range(100):
+        assert str(root) == expected(root)
+        action = rng.random()
+        if action < 0.5:
+            element = HtmlElement('x', rng.choice(['', 'new']))
+            rng.choice(nodes).append(element)
+            nodes.append(element)
+        elif action < 0.8:
+            element = rng.choice(nodes)
+            element.text = f'changed {rng.random()}'
+            element.invalidate()
+        else:
+            children = [HtmlElement('q', 'w'), HtmlElement('q')]
+            rng.choice(nodes).extend(children)
+            nodes.extend(children)
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_indented_subtree(enabled):
+    HtmlElement.cache.enabled = enabled
+    HtmlElement.escape_text = False
+    root, nodes = random_tree(random.Random(7), 200)
+    for element in nodes[::20]:
+        for indent in (0, 3):
+            assert ''.join(element.iter_render(indent)) == expected(element, indent)
+            # второй раз - из кеша
+            assert ''.join(element.iter_render(indent)) == expected(element, indent)
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_text_is_escaped(enabled):
+    HtmlElement.cache.enabled = enabled
+    HtmlElement.escape_text = True
+    root = HtmlElement('p', 'a < b & c')
+    root.append(HtmlElement('b', '<script>'))
+    assert str(root) == '<p>\n  a &lt; b &amp; c\n  <b>\n    &lt;script&gt;\n  </b>\n</p>'
+
+
+def test_warm_cache_only_rebuilds_changed_fragments(cache_settings):
+    cache_settings.enabled = True
+    HtmlElement.escape_text = False
+    html = HtmlBuilder('html')
+    body = html.add_child_builder('body')
+    sections = [body.add_child_builder('section') for _ in range(10)]
+    for section in sections:
+        section.add_children(('li', f'item {i}') for i in range(5))
+    str(html)
+    misses = cache_settings.misses
+    sections[3].add_child('li', 'one more')
+    cached = str(html)
+    # заново собираются только фрагменты измененной секции и ее родителя
+    assert cache_settings.misses - misses == 2
+    cache_settings.enabled = False
+    assert cached == str(html)
+
+
+def test_deep_tree_renders_and_invalidates_without_recursion(cache_settings):
+    cache_settings.enabled = True
+    HtmlElement.escape_text = False
+    root = element = HtmlElement('div')
+    for _ in range(5_000):
+        child = HtmlElement('div', 't')
+        element.append(child)
+        element = child
+    first = str(root)
+    element.append(HtmlElement('span'))
+    second = str(root)
+    assert second != first and second.count('<span>') == 1
+    cache_settings.enabled = False
+    assert str(root) == second
+
+
+def test_write_to_streams_the_same_html(cache_settings):
+    HtmlElement.escape_text = False
+    root, _ = random_tree(random.Random(1), 3_000)
+    for enabled in (False, True):
+        cache_settings.enabled = enabled
+        out = io.StringIO()
+        root.write_to(out, buffer_size=1024)
+        assert out.getvalue() == expected(root)
+
+
+def test_cache_memory_is_released_by_invalidate(cache_settings):
+    cache_settings.enabled = True
+    HtmlElement.escape_text = False
+    root, nodes = random_tree(random.Random(2), 300)
+    before = cache_settings.memory
+    str(root)
+    assert cache_settings.memory > before
+    for element in nodes:
+        element.invalidate()
+    assert cache_settings.memory == before
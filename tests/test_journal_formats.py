@@ -0,0 +1,133 @@
+# Форматы журнала из расширений SRP: текстовый файл с дозаписью и надгробиями, сжатый архив из блоков,
+# бинарный файл с индексом и асинхронное сохранение. Каждый формат должен возвращать те же записи, что и Journal.
+import asyncio
+import os
+import stat
+
+import pytest
+
+from lessons import import_lesson_module
+
+DIRECTORY = 'SOLID/01_Single Responsibility Principle(SRP)'
+lesson = import_lesson_module(DIRECTORY, 'lesson')
+append_only = import_lesson_module(DIRECTORY, 'append_only')
+compressed_journal = import_lesson_module(DIRECTORY, 'compressed_journal')
+indexed_journal = import_lesson_module(DIRECTORY, 'indexed_journal')
+async_persistence = import_lesson_module(DIRECTORY, 'async_persistence')
+
+AppendOnlyPersistenceManager = append_only.AppendOnlyPersistenceManager
+
+
+def make_journal(count, removed=()):
+    journal = lesson.Journal()
+    for i in range(count):
+        journal.add_entry(f'entry {i}: ünïcode')
+    for entry_id in removed:
+        journal.remove_entry(entry_id)
+    return journal
+
+
+def lines_of(journal):
+    return str(journal).split('\n')
+
+
+def test_append_only_continues_a_saved_journal_and_skips_tombstones(tmp_path):
+    filename = str(tmp_path / 'journal.txt')
+    journal = make_journal(3)
+    lesson.PersistenceManager.save_to_file(journal, filename)     # без перевода строки в конце
+    with AppendOnlyPersistenceManager(filename, buffer_size=2).attach(journal):
+        journal.add_entry('appended')
+        journal.remove_entry(2)
+        journal.add_entry('after removal')
+    assert list(AppendOnlyPersistenceManager.load(filename)) == lines_of(journal)
+
+
+def test_append_only_resumes_ids_after_removals(tmp_path):
+    filename = str(tmp_path / 'journal.txt')
+    assert AppendOnlyPersistenceManager.last_id(filename) == 0
+    journal = lesson.Journal()
+    with AppendOnlyPersistenceManager(filename).attach(journal):
+        for i in range(4):
+            journal.add_entry(f'entry {i}')
+        journal.remove_entry(4)
+    resumed = lesson.Journal()
+    resumed.count = AppendOnlyPersistenceManager.last_id(filename)
+    with AppendOnlyPersistenceManager(filename).attach(resumed):
+        assert resumed.add_entry('next session') == 5
+    ids = [line.partition(':')[0] for line in AppendOnlyPersistenceManager.load(filename)]
+    assert ids == ['1', '2', '3', '5']
+
+
+@pytest.mark.parametrize('codec', compressed_journal.CODECS)
+def test_compressed_round_trip(codec, tmp_path):
+    filename = str(tmp_path / 'journal.z')
+    journal = make_journal(2_500, removed=(1, 700))
+    manager = compressed_journal.CompressedPersistenceManager(codec, block_entries=1_000)
+    manager.save_to_file(journal, filename)
+    Manager = compressed_journal.CompressedPersistenceManager
+    assert list(Manager.load(filename)) == lines_of(journal)
+
+    blocks = Manager.blocks(filename)
+    assert [count for _, _, count, _ in blocks] == [1_000, 1_000, 498]
+    assert [first_id for _, _, _, first_id in blocks] == [2, 1_003, 2_003]
+    offset, length, _, _ = blocks[1]
+    assert Manager.load_block(filename, offset, length) == lines_of(journal)[1_000:2_000]
+
+
+def test_compressed_rejects_other_files(tmp_path):
+    filename = str(tmp_path / 'journal.txt')
+    lesson.PersistenceManager.save_to_file(make_journal(3), filename)
+    with pytest.raises(ValueError):
+        list(compressed_journal.CompressedPersistenceManager.load(filename))
+
+
+def test_indexed_round_trip(tmp_path):
+    filename = str(tmp_path / 'journal.idx')
+    journal = make_journal(1_000, removed=(10, 11))
+    indexed_journal.write_indexed_journal(journal, filename)
+    with indexed_journal.MappedJournal(filename) as mapped:
+        assert len(mapped) == len(journal)
+        assert list(mapped) == list(journal)
+        assert mapped.get_entry(12) == journal.get_entry(12)
+        with pytest.raises(KeyError):
+            mapped.get_entry(10)
+        entry_id, raw = mapped.raw_at(0)
+        assert (entry_id, bytes(raw).decode('utf-8')) == (1, journal.get_entry(1))
+        raw.release()
+
+
+def test_indexed_requires_increasing_ids(tmp_path):
+    with pytest.raises(ValueError):
+        indexed_journal.write_indexed_journal([(2, 'b'), (1, 'a')], str(tmp_path / 'journal.idx'))
+
+
+def test_converted_text_journal_skips_removed_entries(tmp_path):
+    source, destination = str(tmp_path / 'journal.txt'), str(tmp_path / 'journal.idx')
+    journal = lesson.Journal()
+    with AppendOnlyPersistenceManager(source).attach(journal):
+        for i in range(5):
+            journal.add_entry(f'entry {i}')
+        journal.remove_entry(3)
+    indexed_journal.convert_text_journal(source, destination)
+    with indexed_journal.MappedJournal(destination) as mapped:
+        assert list(mapped) == list(journal)
+
+
+def test_async_save_keeps_text_and_file_mode(tmp_path):
+    filename = str(tmp_path / 'journal.txt')
+    with open(filename, 'w') as file:
+        file.write('old')
+    os.chmod(filename, 0o640)
+    journal = make_journal(10, removed=(3,))
+
+    async def save():
+        async with async_persistence.AsyncPersistenceManager() as manager:
+            await asyncio.gather(*(manager.save_to_file(journal, filename) for _ in range(3)))
+            return manager.stats()
+
+    stats = asyncio.run(save())
+    assert stats['writes'] + stats['coalesced'] == 3
+    with open(filename, encoding='utf-8') as file:
+        assert file.read() == str(journal)
+    assert stat.S_IMODE(os.stat(filename).st_mode) == 0o640
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
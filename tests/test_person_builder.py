@@ -0,0 +1,27 @@
+# Пакетная сборка Person по сопоставлению "шаг строителя -> колонка строки".
+import pytest
+
+from lessons import import_lesson_module
+
+builders = import_lesson_module('Builder', 'combning_builders_via_inteface')
+PersonBuilder = builders.PersonBuilder
+
+ROWS = [{'city': 'London', 'company': 'Google'}, {'city': 'Paris', 'company': 'Airbus'}]
+
+
+def test_build_many_and_build_columns_agree():
+    mapping = {'lives.in_city': 'city', 'works.at': 'company'}
+    people = list(PersonBuilder.build_many(ROWS, mapping))
+    batch = PersonBuilder.build_columns(ROWS, mapping)
+    assert [(p.city, p.company_name) for p in people] == [('London', 'Google'), ('Paris', 'Airbus')]
+    assert [(p.city, p.company_name) for p in batch] == [(p.city, p.company_name) for p in people]
+
+
+@pytest.mark.parametrize('step', ['works.release', 'lives.build_many', 'works.build', 'lives.works',
+                                  'works._private', 'works.__init__', 'works.missing', 'home.at'])
+def test_only_facet_steps_are_accepted(step):
+    with pytest.raises(ValueError):
+        PersonBuilder.build_many(ROWS, {step: 'city'})
+    with pytest.raises(ValueError):
+        PersonBuilder.build_columns(ROWS, {step: 'city'})
+
@@ -0,0 +1,77 @@
+# Одни и те же запросы на каждом хранилище из примеров DIP во всех режимах ResearchEngine должны давать
+# те же ответы, что и прямые вызовы браузера.
+import multiprocessing
+import os
+
+import pytest
+
+from lessons import import_lesson_module, lesson_directory
+
+DIRECTORY = 'SOLID/05_Dependency Inversion Principle(DIP)'
+research_engine = import_lesson_module(DIRECTORY, 'research_engine')
+lesson = import_lesson_module(DIRECTORY, 'lesson')
+graph_relationships = import_lesson_module(DIRECTORY, 'graph_relationships')
+compact_relationships = import_lesson_module(DIRECTORY, 'compact_relationships')
+sqlite_relationships = import_lesson_module(DIRECTORY, 'sqlite_relationships')
+
+PAIRS = [('Adam', 'John'), ('Eve', 'John'), ('Adam', 'Mary'), ('John', 'Chris'), ('John', 'Matt'),
+         ('Mary', 'Ann'), ('Chris', 'Bob')]
+NAMES = sorted({name for pair in PAIRS for name in pair})
+QUERIES = [(name, query) for name in NAMES for query in research_engine.QUERIES]
+
+BROWSERS = {
+    'relationships': lambda tmp_path: lesson.Relationships(),
+    'graph': lambda tmp_path: graph_relationships.GraphRelationships(),
+    'compact': lambda tmp_path: compact_relationships.CompactRelationships(),
+    'sqlite-memory': lambda tmp_path: sqlite_relationships.SqliteRelationships(),
+    'sqlite-file': lambda tmp_path: sqlite_relationships.SqliteRelationships(os.path.join(tmp_path, 'relations.db')),
+}
+MODES = [('thread', None)] + [('process', method) for method in ('fork', 'spawn', 'forkserver')
+                              if method in multiprocessing.get_all_start_methods()]
+
+
+@pytest.fixture(autouse=True)
+def dip_directory():
+    # Рабочие процессы spawn/forkserver импортируют research_engine по имени, поэтому каталог нужен в sys.path
+    with lesson_directory(DIRECTORY):
+        yield
+
+
+def make_browser(kind, tmp_path):
+    browser = BROWSERS[kind](str(tmp_path))
+    for parent, child in PAIRS:
+        browser.add_parent_and_child(lesson.Person(parent), lesson.Person(child))
+    return browser
+
+
+@pytest.mark.parametrize('kind', BROWSERS)
+@pytest.mark.parametrize('executor, method', MODES)
+def test_engine_matches_direct_queries(kind, executor, method, tmp_path):
+    browser = make_browser(kind, tmp_path)
+    context = multiprocessing.get_context(method) if method else None
+    engine = research_engine.ResearchEngine(browser, workers=2, executor=executor, mp_context=context)
+    if executor == 'process' and getattr(browser, 'in_memory', False):
+        # База SQLite в памяти не передается в другой процесс
+        with pytest.raises(TypeError):
+            engine.run(QUERIES)
+        return
+    # Движок запускается до прямых запросов: он должен видеть и еще не сброшенные записи
+    results = engine.run(QUERIES)
+    expected = [tuple(getattr(browser, research_engine.QUERIES[query])(name)) for name, query in QUERIES]
+    for result, want in zip(results, expected):
+        assert result.error is None
+        assert sorted(result.result) == sorted(want), (result.name, result.query)
+
+
+def test_duplicate_queries_run_once_and_keep_order():
+    browser = make_browser('graph', None)
+    queries = [('John', 'children'), ('Bob', 'ancestors'), ('John', 'children')]
+    results = research_engine.ResearchEngine(browser, workers=2).run(queries)
+    assert [(r.name, r.query) for r in results] == queries
+    assert results[0] is results[2]
+    assert results[1].result == ('Chris', 'John', 'Adam', 'Eve')
+
+
+def test_unknown_query_is_rejected():
+    with pytest.raises(ValueError):
+        research_engine.ResearchEngine(make_browser('graph', None)).run([('John', 'grandchildren')])